@@ -32,10 +32,10 @@ setup(name='python-viber-bot',
       # long_description=fd.read(),
       packages=packages,
       install_requires=requirements(),
-      # extras_require={
-      #     'json': 'ujson',
-      #     'socks': 'PySocks'
-      # },
+      extras_require={
+          'json': 'orjson',
+          # 'socks': 'PySocks'
+      },
       include_package_data=True,
       classifiers=[
           'Development Status :: 3 - Alpha',
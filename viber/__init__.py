@@ -2,7 +2,7 @@ from .base import ViberObject
 from .user import User
 from .message import Message
 
-from .event import Event
+from .event import Event, LazyEvent
 from .bot import Bot
 from .files.contact import Contact
 from .files.location import Location
@@ -0,0 +1,88 @@
+"""This module contains an object that represents an asyncio friendly Viber Bot."""
+import asyncio
+
+from viber.broadcast import BroadcastResult
+from viber.bot import Bot
+from viber.constants import MAX_BROADCAST_LIST_LENGTH
+from viber.error import ViberError
+from viber.utils.asyncrequest import AsyncRequest
+
+
+class AsyncBot(Bot):
+    """
+    This object represents a Viber Bot whose API methods return awaitables.
+
+    It builds exactly the same payloads as :class:`viber.Bot`, but sends them through a
+    :class:`viber.utils.asyncrequest.AsyncRequest`, so ``send_message``, ``send_picture``,
+    ``send_carousel`` and the other send methods, as well as ``set_webhook`` and
+    ``delete_webhook`` must be awaited. Many sends can be run concurrently on one event loop
+    with :func:`asyncio.gather`.
+
+    Note:
+        The account info properties (:attr:`id`, :attr:`uri`, ...) can't be loaded lazily from
+        synchronous code, ``await bot.get_account_info()`` once before using them.
+
+    Args:
+       token (:obj:`str`): Bot's unique authentication.
+       name (:obj:`str`, optional): Bot's name.
+       avatar (:obj:`str`, optional): Bot's avatar url.
+       base_url (:obj:`str`, optional): Viber Bot API service URL.
+       request (:class:`viber.utils.asyncrequest.AsyncRequest`, optional): Pre initialized
+           request object.
+    """
+
+    def __init__(self, token, name=None, avatar=None, base_url=None, request=None):
+        super(AsyncBot, self).__init__(token, name, avatar, base_url,
+                                       request=request or AsyncRequest(token))
+
+    def _load_info(self):
+        raise ViberError('Account info is not loaded, await get_account_info() first')
+
+    async def _post_message(self, url, payload, timeout=None, retry=False):
+        result = await self._request.post(url, payload, timeout=timeout, retry=retry)
+        return self._to_message(result, payload)
+
+    async def get_account_info(self, timeout=None):
+        """
+        Same as :meth:`viber.Bot.get_account_info`, but awaitable.
+
+        Returns:
+            :obj:`dict`: A dict of parameters representing that bot.
+
+        Raises:
+            :class:`viber.ViberError`
+
+        """
+        url = '{0}/get_account_info'.format(self.base_url)
+        result = await self._request.post(url, {}, timeout=timeout)
+        self.info = result
+        return result
+
+    async def _post_chunk(self, url, chunk, timeout=None):
+        broadcast_list, body = chunk
+        try:
+            result = await self._request.post(url, body, timeout=timeout)
+        except ViberError as error:
+            self.logger.warning('Broadcast chunk of %d receivers failed: %s', len(broadcast_list), error)
+            return BroadcastResult(broadcast_list, error=error)
+
+        return BroadcastResult.from_response(broadcast_list, result)
+
+    async def broadcast(self, user_ids, method='send_message', chunk_size=MAX_BROADCAST_LIST_LENGTH, workers=None,
+                        timeout=None, **kwargs):
+        """Same as :meth:`viber.Bot.broadcast`, but awaitable.
+
+        Without ``workers`` all chunks are handed to the request at once and its
+        ``con_pool_size`` bounds how many are in flight.
+        """
+        url, chunks = self._broadcast_chunks(method, user_ids, chunk_size, **kwargs)
+        if workers is None:
+            return list(await asyncio.gather(*[self._post_chunk(url, chunk, timeout) for chunk in chunks]))
+
+        semaphore = asyncio.Semaphore(workers)
+
+        async def post(chunk):
+            async with semaphore:
+                return await self._post_chunk(url, chunk, timeout)
+
+        return list(await asyncio.gather(*[post(chunk) for chunk in chunks]))
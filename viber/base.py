@@ -1,18 +1,64 @@
-import json
 from abc import ABCMeta
 
+from viber.utils import codec
+
+
+# (slot names, whether instances have a __dict__) per class, see _attr_layout
+_ATTR_LAYOUTS = {}
+
+
+def _attr_layout(cls):
+    """Names of the slots of ``cls`` and its bases which hold attributes and whether instances
+    of ``cls`` have a ``__dict__``, computed once per class."""
+    layout = _ATTR_LAYOUTS.get(cls)
+    if layout is None:
+        hidden = set(cls._hidden_slots) | {'__dict__', '__weakref__'}
+        names = []
+        has_dict = False
+        for klass in reversed(cls.__mro__):
+            if klass is object:
+                continue
+            slots = klass.__dict__.get('__slots__')
+            if slots is None:
+                has_dict = True
+                continue
+            if isinstance(slots, str):
+                slots = (slots,)
+            has_dict = has_dict or '__dict__' in slots
+            names.extend(name for name in slots if name not in hidden)
+        layout = _ATTR_LAYOUTS[cls] = (tuple(names), has_dict)
+    return layout
+
 
 class ViberObject(object):
-    """Base class for most viber objects."""
+    """Base class for most viber objects.
+
+    Subclasses may declare ``__slots__`` instead of keeping their attributes in a ``__dict__``,
+    :meth:`to_dict` and item access work the same for both. Slots listed in ``_hidden_slots``
+    hold internal state and are left out of both.
+    """
 
     __metaclass__ = ABCMeta
+    __slots__ = ()
     _id_attrs = ()
+    _hidden_slots = ()
 
     def __str__(self):
         return str(self.to_dict())
 
+    def _attr_names(self):
+        names, has_dict = _attr_layout(type(self))
+        if has_dict:
+            return names + tuple(self.__dict__) if names else tuple(self.__dict__)
+        return names
+
     def __getitem__(self, item):
-        return self.__dict__[item]
+        if item in self._attr_names():
+            try:
+                return getattr(self, item)
+            except AttributeError:
+                pass
+        raise KeyError(item)
 
     @classmethod
     def from_dict(cls, data, bot):
@@ -30,17 +76,17 @@ class ViberObject(object):
 
         """
 
-        return json.dumps(self.to_dict())
+        return codec.dumps(self.to_dict()).decode('utf-8')
 
     def to_dict(self):
         data = dict()
 
-        for key in iter(self.__dict__):
+        for key in self._attr_names():
             if key in ('bot',
                        '_id_attrs'):
                 continue
 
-            value = self.__dict__[key]
+            value = getattr(self, key, None)
             if value is not None:
                 if hasattr(value, 'to_dict'):
                     data[key] = value.to_dict()
@@ -1,12 +1,17 @@
 """This module contains an object that represents a Viber Bot."""
 import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from viber import User
 from viber.base import ViberObject
+from viber.broadcast import BroadcastResult
+from viber.constants import MAX_BROADCAST_LIST_LENGTH
 from viber.enums import MessageType, EventType
-from viber.error import InvalidToken
+from viber.error import InvalidToken, ViberError
 from viber.message import Message, Contact, Location
+from viber.template import MessageTemplate
+from viber.utils import codec
 from viber.utils.helpers import get_enum
 from viber.utils.request import Request
 
@@ -29,7 +34,7 @@ def info(func):
     @functools.wraps(func)
     def decorator(self, *args, **kwargs):
         if not self.info:
-            self.get_account_info()
+            self._load_info()
 
         result = func(self, *args, **kwargs)
         return result
@@ -40,20 +45,12 @@ def info(func):
 def message(func):
     @functools.wraps(func)
     def decorator(self, *args, **kwargs):
+        retry = kwargs.pop('retry', False)
         url, payload = func(self, *args, **kwargs)
 
-        result = self._request.post(url, payload, timeout=kwargs.get('timeout'))
-
-        if result is True:
-            return result
-
-        mes = Message(payload['type'])
-        for key in payload:
-            if hasattr(mes, key):
-                setattr(mes, key, payload[key])
-
-        return mes
+        return self._post_message(url, payload, timeout=kwargs.get('timeout'), retry=retry)
 
+    decorator.build_payload = func
     return decorator
 
 
@@ -85,6 +82,146 @@ class Bot(ViberObject):
     def request(self):
         return self._request
 
+    def _load_info(self):
+        self.get_account_info()
+
+    def _post_message(self, url, payload, timeout=None, retry=False):
+        if retry:
+            return self._request.post(url, payload, timeout=timeout, retry=True,
+                                      callback=lambda result: self._to_message(result, payload))
+
+        result = self._request.post(url, payload, timeout=timeout, retry=False)
+        return self._to_message(result, payload)
+
+    @staticmethod
+    def _to_message(result, payload):
+        if result is True:
+            return result
+
+        # Encoded payloads of templates keep their values
+        payload = getattr(payload, 'payload', payload)
+        mes = Message(payload['type'])
+        for key in payload:
+            if hasattr(mes, key):
+                setattr(mes, key, payload[key])
+
+        return mes
+
+    def _build_payload(self, method, user_id, **kwargs):
+        """Build ``(url, payload)`` of a send method without posting it."""
+        name = getattr(method, '__name__', method)
+        builder = getattr(getattr(type(self), name, None), 'build_payload', None)
+        if builder is None:
+            raise TypeError("{0} is not a send method".format(name))
+
+        return builder(self, user_id, **kwargs)
+
+    def _broadcast_chunks(self, method, user_ids, chunk_size, **kwargs):
+        """Split receivers into chunks and pre-encode the request body of every chunk.
+
+        The payload shared by all chunks is serialized once, only the ``broadcast_list`` is
+        encoded per chunk.
+        """
+        if not 0 < chunk_size <= MAX_BROADCAST_LIST_LENGTH:
+            raise ValueError('chunk_size must be in range 1-{0}'.format(MAX_BROADCAST_LIST_LENGTH))
+
+        _, payload = self._build_payload(method, None, **kwargs)
+        del payload['receiver']
+        # The send methods post to send_message, which takes a single receiver
+        url = '{0}/broadcast_message'.format(self.base_url)
+
+        common = codec.dumps(payload)
+        tail = b',' + common[1:] if payload else b'}'
+
+        user_ids = list(user_ids)
+        chunks = []
+        for i in range(0, len(user_ids), chunk_size):
+            broadcast_list = user_ids[i:i + chunk_size]
+            body = b'{"broadcast_list":' + codec.dumps(broadcast_list) + tail
+            chunks.append((broadcast_list, body))
+
+        return url, chunks
+
+    def _post_chunk(self, url, chunk, timeout=None):
+        broadcast_list, body = chunk
+        try:
+            result = self._request.post(url, body, timeout=timeout)
+        except ViberError as error:
+            self.logger.warning('Broadcast chunk of %d receivers failed: %s', len(broadcast_list), error)
+            return BroadcastResult(broadcast_list, error=error)
+
+        return BroadcastResult.from_response(broadcast_list, result)
+
+    def broadcast(self, user_ids, method='send_message', chunk_size=MAX_BROADCAST_LIST_LENGTH, workers=None,
+                  timeout=None, **kwargs):
+        """Use this method to send one message to any number of users.
+
+        Receivers are split into chunks of at most :attr:`viber.constants.MAX_BROADCAST_LIST_LENGTH`,
+        the payload is built and serialized once and the chunks are posted concurrently to the
+        ``broadcast_message`` endpoint over the connection pool of :attr:`request`. A failed chunk doesn't stop the others, check
+        :attr:`viber.broadcast.BroadcastResult.ok` of every returned result.
+
+        Message and Keyboard can contain the same placeholders as in :meth:`send_message`.
+
+        Args:
+            user_ids (List[:obj:`str`]): Unique identifiers of the target users.
+            method (:obj:`str` | :obj:`callable`, optional): Send method to build the message with,
+                e.g. ``'send_picture'`` or ``bot.send_picture``. Defaults to ``'send_message'``.
+            chunk_size (:obj:`int`, optional): Receivers per request.
+            workers (:obj:`int`, optional): Number of chunks posted simultaneously, at most the
+                connection pool size of :attr:`request`. Defaults to the pool size, which is ``1``
+                for a bot created without a request, so to post chunks concurrently create the bot
+                with e.g. ``Request(token, con_pool_size=8)``.
+            timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
+                the read timeout from the server (instead of the one specified during creation of
+                the connection pool).
+            **kwargs (:obj:`dict`): Arguments of the send method, e.g. ``text`` or ``keyboard``.
+
+        Returns:
+            List[:class:`viber.broadcast.BroadcastResult`]: One result per chunk, in order.
+
+        Raises:
+            ValueError: If ``chunk_size`` or ``workers`` is out of range.
+
+        """
+        pool_size = self._request.con_pool_size
+        if workers is not None and not 0 < workers <= pool_size:
+            raise ValueError('workers must be in range 1-{0}, the connection pool size'.format(pool_size))
+
+        url, chunks = self._broadcast_chunks(method, user_ids, chunk_size, **kwargs)
+        if not chunks:
+            return []
+
+        workers = min(workers or pool_size, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda chunk: self._post_chunk(url, chunk, timeout), chunks))
+
+    def compile_message(self, method='send_message', fields=('text',), **kwargs):
+        """Precompile a message which is sent many times with only a few fields changing.
+
+        The payload is built and encoded once with the constant arguments, every send of the
+        returned template only encodes the receiver and the values of ``fields``::
+
+            template = bot.compile_message('send_message', fields=('text',), keyboard=menu)
+            for user_id, name in users:
+                template.send(user_id, text='Hello, {0}!'.format(name))
+
+        Args:
+            method (:obj:`str` | :obj:`callable`, optional): Send method to build the message with,
+                e.g. ``'send_picture'`` or ``bot.send_picture``. Defaults to ``'send_message'``.
+            fields (List[:obj:`str`], optional): Arguments of the send method which change per
+                send. They must be put into the payload as they are. Defaults to ``('text',)``.
+            **kwargs (:obj:`dict`): The constant arguments of the send method.
+
+        Returns:
+            :class:`viber.template.MessageTemplate`
+
+        Raises:
+            ValueError: If a field is not used as a value of the payload.
+
+        """
+        return MessageTemplate(self, method, fields, **kwargs)
+
     @staticmethod
     def _validate_token(token):
         """A very basic validation on token."""
@@ -270,8 +407,8 @@ class Bot(ViberObject):
         _url = '{0}/set_webhook'.format(self.base_url)
         payload = {'url': url,
                    'event_types': [et.value for et in event_types],
-                   send_name: send_name,
-                   send_photo: send_photo}
+                   'send_name': send_name,
+                   'send_photo': send_photo}
 
         payload.update(kwargs)
         result = self._request.post(_url, payload, timeout=timeout)
@@ -321,10 +458,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -352,7 +492,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -386,10 +526,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -421,7 +564,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -454,10 +597,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -490,7 +636,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -524,10 +670,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -556,7 +705,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -585,10 +734,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -623,7 +775,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -653,10 +805,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -692,7 +847,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -720,10 +875,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -751,7 +909,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -778,10 +936,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -809,7 +970,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -840,10 +1001,13 @@ class Bot(ViberObject):
             timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
                 the read timeout from the server (instead of the one specified during creation of
                 the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice. Failed sends are
+                retried in the background according to the retry policy of :attr:`request`.
             **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
         Returns:
-            :class:`viber.Message`: On success, the sent message is returned.
+            :class:`viber.Message`: On success, the sent message is returned. With ``retry`` a
+            :class:`viber.utils.retry.RetryPromise` of the message is returned instead.
 
         Raises:
             :class:`viber.ViberError`
@@ -852,7 +1016,7 @@ class Bot(ViberObject):
         url = '{0}/send_message'.format(self.base_url)
         payload = {
             "type": MessageType.rich_media.value,
-            "rich_media": rich_media.to_dict(),
+            "rich_media": rich_media.to_payload(),
         }
         if isinstance(user_id, list):
             payload['broadcast_list'] = user_id
@@ -871,7 +1035,7 @@ class Bot(ViberObject):
         if tracking_data:
             payload["tracking_data"] = tracking_data
         if keyboard:
-            payload["keyboard"] = keyboard.to_dict()
+            payload["keyboard"] = keyboard.to_payload()
 
         payload.update(kwargs)
         return url, payload
@@ -0,0 +1,39 @@
+"""This module contains an object that represents the result of one broadcast chunk."""
+from viber.base import ViberObject
+
+
+class BroadcastResult(ViberObject):
+    """This object represents the outcome of posting one chunk of a broadcast.
+
+    Attributes:
+        broadcast_list (List[:obj:`str`]): Receivers of this chunk.
+        message_token (:obj:`int`): Optional. Unique identifier of the sent message.
+        failed_list (List[:obj:`dict`]): Receivers the message could not be delivered to, each
+            with ``receiver``, ``status`` and ``status_message`` as reported by Viber.
+        error (:class:`viber.error.ViberError`): Optional. The error which failed the whole chunk.
+
+    Args:
+        broadcast_list (List[:obj:`str`]): Receivers of this chunk.
+        message_token (:obj:`int`, optional): Unique identifier of the sent message.
+        failed_list (List[:obj:`dict`], optional): Receivers the message could not be delivered to.
+        error (:class:`viber.error.ViberError`, optional): The error which failed the whole chunk.
+
+    """
+
+    def __init__(self, broadcast_list, message_token=None, failed_list=None, error=None):
+        self.broadcast_list = broadcast_list
+        self.message_token = message_token
+        self.failed_list = failed_list or []
+        self.error = error
+
+    @property
+    def ok(self):
+        """:obj:`bool`: ``True`` if the chunk was accepted by Viber."""
+        return self.error is None
+
+    @classmethod
+    def from_response(cls, broadcast_list, data):
+        if not isinstance(data, dict):
+            return cls(broadcast_list)
+
+        return cls(broadcast_list, data.get('message_token'), data.get('failed_list'))
@@ -12,11 +12,13 @@ MAX_URL_LENGTH = 2000
 
 # constants above this line are tested
 
+MAX_BROADCAST_LIST_LENGTH = 300
+MAX_MESSAGES_PER_SECOND_PER_CHAT = 1
+MAX_MESSAGES_PER_SECOND = 30
+
 # SUPPORTED_WEBHOOK_PORTS = [443, 80, 88, 8443]
 # MAX_FILESIZE_DOWNLOAD = int(20E6)  # (20MB)
 # MAX_FILESIZE_UPLOAD = int(50E6)  # (50MB)
-# MAX_MESSAGES_PER_SECOND_PER_CHAT = 1
-# MAX_MESSAGES_PER_SECOND = 30
 # MAX_MESSAGES_PER_MINUTE_PER_GROUP = 20
 # MAX_MESSAGE_ENTITIES = 100
 # MAX_INLINE_QUERY_RESULTS = 50
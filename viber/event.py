@@ -1,7 +1,7 @@
 """This module contains an object that represents a Viber Update."""
 
 from viber.base import ViberObject
-from viber.enums import EventType
+from viber.enums import EventType, MessageType
 from viber.message import Message
 from viber.user import User
 from viber.utils.helpers import get_enum, from_timestamp
@@ -43,6 +43,8 @@ class Event(ViberObject):
         message (:obj:`viber.Message`, optional): Message attached to event.
         sender (:obj:`viber.User`, optional): User who send the message.
         """
+    __slots__ = ('event', 'timestamp', 'message_token', 'chat_hostname', 'silent', 'user_id',
+                 'desc', 'user', 'type', 'context', 'subscribed', 'message', 'sender')
 
     def __init__(self,
                  event,
@@ -99,3 +101,69 @@ class Event(ViberObject):
                 data['user_id'] = data['sender'].id
 
         return cls(**data)
+
+
+class LazyEvent(Event):
+    """An :class:`Event` which keeps the decoded JSON and builds its timestamp, users, message
+    and other optional fields on first access. The fields used to dispatch the event
+    (:attr:`event`, :attr:`message_token`, :attr:`silent`, :attr:`user_id` and
+    :attr:`chat_hostname`) are read right away and the type of the message is checked.
+
+    Note:
+        Invalid values of the lazy fields raise on first access instead of when decoding.
+
+    Args:
+        data (:obj:`dict`): The decoded JSON of the event.
+        bot (:class:`viber.Bot`): The Bot to use for instance methods of the fields.
+
+    """
+    __slots__ = ('_data', '_bot')
+    _hidden_slots = __slots__
+
+    _loaders = {
+        'timestamp': lambda data, bot: from_timestamp(data['timestamp']),
+        'desc': lambda data, bot: data.get('desc'),
+        'user': lambda data, bot: User.from_dict(data.get('user'), bot),
+        'type': lambda data, bot: data.get('type'),
+        'context': lambda data, bot: data.get('context'),
+        'subscribed': lambda data, bot: data.get('subscribed'),
+        'message': lambda data, bot: Message.from_dict(data.get('message'), bot),
+        'sender': lambda data, bot: User.from_dict(data.get('sender'), bot),
+    }
+
+    def __init__(self, data, bot):
+        self._data = data
+        self._bot = bot
+
+        self.event = get_enum(data.get('event'), EventType, 'event_type')
+        self.message_token = data.get('message_token')
+        self.chat_hostname = data.get('chat_hostname')
+        self.silent = data.get('silent')
+
+        user_id = data.get('user_id')
+        if not user_id:
+            user = data.get('user') or data.get('sender')
+            user_id = user.get('id') if user else None
+        self.user_id = user_id
+
+        # The dispatcher needs the message type, so an invalid one fails here and not there
+        message = data.get('message')
+        if message:
+            get_enum(message.get('type'), MessageType, 'message_type')
+
+    def __getattr__(self, name):
+        # Only called for slots which are not set yet
+        loader = self._loaders.get(name)
+        if loader is None:
+            raise AttributeError(name)
+
+        value = loader(self._data, self._bot)
+        setattr(self, name, value)
+        return value
+
+    @classmethod
+    def from_dict(cls, data, bot):
+        if not data:
+            return None
+
+        return cls(data, bot)
@@ -1,10 +1,12 @@
 from future.utils import string_types
 
+from viber.enums import EventType
 from viber.event import Event
 from viber.ext.handler import Handler
 
 
 class CommandHandler(Handler):
+    event_types = (EventType.message,)
 
     def __init__(self,
                  command,
@@ -0,0 +1,116 @@
+"""This module contains the CommandRouter class."""
+from viber.enums import EventType
+from viber.event import Event
+from viber.ext.commandhandler import CommandHandler
+from viber.ext.handler import Handler
+
+
+class CommandRouter(Handler):
+    """
+    Handler which routes commands to many :class:`viber.ext.commandhandler.CommandHandler` at
+    once. The command is parsed once per event and looked up in a dict of all the commands and
+    aliases, instead of every command handler checking the event in turn.
+
+    The command is the first word of the text without the leading ``/``, matched case
+    insensitively. Of several handlers registered for the same command, the first one whose
+    filters pass handles the event.
+
+    Args:
+        handlers (List[:class:`viber.ext.commandhandler.CommandHandler`], optional): Handlers to
+            route to, in order of priority.
+
+    """
+    event_types = (EventType.message,)
+
+    def __init__(self, handlers=None):
+        super(CommandRouter, self).__init__(None)
+
+        self.handlers = []
+        self.routes = {}
+        """Dict[:obj:`str`, List[:class:`viber.ext.commandhandler.CommandHandler`]]: Handlers
+        per command."""
+
+        for handler in (handlers or []):
+            self.add_handler(handler)
+
+    def add_handler(self, handler):
+        """
+        Route the commands of ``handler`` to it.
+
+        Args:
+            handler (:class:`viber.ext.commandhandler.CommandHandler`): A CommandHandler instance.
+
+        """
+        if not isinstance(handler, CommandHandler):
+            raise TypeError('handler is not an instance of {0}'.format(CommandHandler.__name__))
+
+        self.handlers.append(handler)
+        for command in handler.command:
+            self.routes.setdefault(command, []).append(handler)
+
+    def add_command(self, command, callback, **kwargs):
+        """
+        Shortcut for ``add_handler(CommandHandler(command, callback, **kwargs))``.
+
+        Returns:
+            :class:`viber.ext.commandhandler.CommandHandler`: The created handler.
+
+        """
+        handler = CommandHandler(command, callback, **kwargs)
+        self.add_handler(handler)
+        return handler
+
+    def remove_handler(self, handler):
+        """
+        Stop routing to ``handler``.
+
+        Args:
+            handler (:class:`viber.ext.commandhandler.CommandHandler`): A CommandHandler instance.
+
+        """
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+            for command in handler.command:
+                self.routes[command].remove(handler)
+                if not self.routes[command]:
+                    del self.routes[command]
+
+    @staticmethod
+    def parse_command(text):
+        """
+        Args:
+            text (:obj:`str`): Text of a message.
+
+        Returns:
+            :obj:`str`: The lower case command of ``text``, or ``None`` if it isn't a command.
+
+        """
+        if not text or not text.startswith('/'):
+            return None
+
+        words = text.split(None, 1)
+        command = words[0].lstrip('/') if words else None
+        return command.lower() if command else None
+
+    def check_event(self, event):
+        if not isinstance(event, Event) or not event.message:
+            return False
+
+        handlers = self.routes.get(self.parse_command(event.message.text))
+        if not handlers:
+            return False
+
+        for handler in handlers:
+            if handler.filters is None or handler.filters(event.message):
+                self._set_check_result(event, handler)
+                return True
+
+        return False
+
+    def handle_event(self, event, dispatcher):
+        handler = self._get_check_result(event)
+        if handler is None:
+            self.check_event(event)
+            handler = self._get_check_result(event)
+
+        return handler.handle_event(event, dispatcher)
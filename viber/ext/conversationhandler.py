@@ -1,4 +1,5 @@
 import logging
+from threading import local
 
 from viber.event import Event
 from viber.ext.handler import Handler
@@ -32,8 +33,8 @@ class ConversationHandler(Handler):
 
         self.timeout_jobs = dict()
         self.conversations = dict()
-        self.current_conversation = None
-        self.current_handler = None
+        # Set by check_event for handle_event, per thread as events may be dispatched in parallel
+        self._current = local()
 
         self.logger = logging.getLogger(__name__)
 
@@ -44,6 +45,22 @@ class ConversationHandler(Handler):
         for state_handlers in states.values():
             all_handlers.extend(state_handlers)
 
+    @property
+    def current_conversation(self):
+        return getattr(self._current, 'conversation', None)
+
+    @current_conversation.setter
+    def current_conversation(self, value):
+        self._current.conversation = value
+
+    @property
+    def current_handler(self):
+        return getattr(self._current, 'handler', None)
+
+    @current_handler.setter
+    def current_handler(self, value):
+        self._current.handler = value
+
     def _get_key(self, event):
         user_id = event.user_id
 
@@ -8,10 +8,13 @@ from time import sleep
 from uuid import uuid4
 
 from viber.error import ViberError
+from viber.event import Event as ViberEvent
 from viber.ext.handler import Handler
 from viber.utils.promise import Promise
 
 DEFAULT_GROUP = 0
+# Events waiting per shard when the event queue is unbounded
+DEFAULT_SHARD_QUEUE_SIZE = 100
 
 
 def run_async(func):
@@ -49,6 +52,7 @@ class Dispatcher(object):
             instance to pass onto handler callbacks.
         workers (:obj:`int`): Number of maximum concurrent worker threads for the ``@run_async``
             decorator.
+        shards (:obj:`int`): Optional. Number of threads processing events.
 
     Args:
         bot (:class:`viber.Bot`): The bot object that should be passed to the handlers.
@@ -57,6 +61,13 @@ class Dispatcher(object):
                 instance to pass onto handler callbacks.
         workers (:obj:`int`, optional): Number of maximum concurrent worker threads for the
             ``@run_async`` decorator. defaults to 4.
+        shards (:obj:`int`, optional): Process events in this many threads instead of the
+            dispatcher thread. Events are assigned to a thread by their ``user_id``, so the events
+            of one user are still handled one after another and in order, while different users
+            are handled in parallel. Handlers must be thread safe when this is used. Every shard
+            queues as many events as the bounded ``event_queue``, or
+            :data:`DEFAULT_SHARD_QUEUE_SIZE`. When the queue of a shard is full the dispatcher
+            waits, so the limit and overflow policy of the event queue still apply.
 
     """
 
@@ -65,12 +76,14 @@ class Dispatcher(object):
     __singleton = None
     logger = logging.getLogger(__name__)
 
-    def __init__(self, bot, event_queue, workers=4, process_silent_events=False, exception_event=None, job_queue=None):
+    def __init__(self, bot, event_queue, workers=4, process_silent_events=False, exception_event=None, job_queue=None,
+                 shards=None):
         self.event_queue = event_queue
         self.job_queue = job_queue
         self.bot = bot
         self.workers = workers
         self.process_silent_events = process_silent_events
+        self.shards = shards
 
         self.handlers = {}
         """Dict[:obj:`int`, List[:class:`viber.ext.Handler`]]: Holds the handlers per group."""
@@ -78,6 +91,8 @@ class Dispatcher(object):
         """List[:obj:`callable`]: A list of errorHandlers."""
         self.groups = []
         """List[:obj:`int`]: A list with all groups."""
+        self.__candidates = {}
+        self.__candidates_version = Handler._types_version
         self.user_data = defaultdict(dict)
         """:obj:`dict`: A dictionary handlers can use to store data for the user."""
         self.chat_data = defaultdict(dict)
@@ -88,6 +103,8 @@ class Dispatcher(object):
         self.__exception_event = exception_event or Event()
         self.__async_queue = Queue()
         self.__async_threads = set()
+        self.__shard_queues = []
+        self.__shard_threads = []
 
     @classmethod
     def _set_singleton(cls, val):
@@ -150,6 +167,10 @@ class Dispatcher(object):
             group will not be used. The order in which handlers were added to the group defines the
             priority.
 
+        Handlers are only checked against events of the types in their
+        :attr:`viber.ext.Handler.event_types` and :attr:`viber.ext.Handler.message_types`, which
+        must not change after the handler was added.
+
         Args:
             handler (:class:`viber.ext.Handler`): A Handler instance.
             group (:obj:`int`, optional): The group identifier. Default is 0.
@@ -166,6 +187,7 @@ class Dispatcher(object):
             self.groups = sorted(self.groups)
 
         self.handlers[group].append(handler)
+        self.__candidates = {}
 
     def remove_handler(self, handler, group=DEFAULT_GROUP):
         """Remove a handler from the specified group.
@@ -180,6 +202,7 @@ class Dispatcher(object):
             if not self.handlers[group]:
                 del self.handlers[group]
                 self.groups.remove(group)
+            self.__candidates = {}
 
     def add_error_handler(self, callback):
         """Registers an error handler in the Dispatcher.
@@ -227,7 +250,10 @@ class Dispatcher(object):
             self.logger.error(msg)
             raise ViberError(msg)
 
-        self._init_async_threads(uuid4(), self.workers)
+        base_name = uuid4()
+        self._init_async_threads(base_name, self.workers)
+        if self.shards:
+            self._init_shards(base_name, self.shards)
         self.running = True
         self.logger.debug('Dispatcher started')
 
@@ -247,10 +273,19 @@ class Dispatcher(object):
                     break
                 continue
 
-            self.logger.debug('Processing Event: %s' % event)
-            if not event.silent or (event.silent and self.process_silent_events):
-                self.process_event(event)
+            # Only eager fields, formatting the whole event would load the lazy ones
+            self.logger.debug('Processing Event with message_token %s', getattr(event, 'message_token', None))
+            try:
+                if not event.silent or (event.silent and self.process_silent_events):
+                    if self.__shard_queues:
+                        self._shard_queue(event).put(event)
+                    else:
+                        self.process_event(event)
+            # Errors should not stop the thread.
+            except Exception:
+                self.logger.exception('An uncaught error was raised while dispatching the event')
 
+        self._stop_shards()
         self.running = False
         self.logger.debug('Dispatcher thread stopped')
 
@@ -271,6 +306,39 @@ class Dispatcher(object):
                     'DispatcherHandlerStop is not supported with async functions; func: %s',
                     promise.pooled_function.__name__)
 
+    def _sharded(self, queue):
+        while 1:
+            event = queue.get()
+            if event is None:
+                break
+            self.process_event(event)
+
+    def _init_shards(self, base_name, shards):
+        maxsize = getattr(self.event_queue, 'maxsize', 0) or DEFAULT_SHARD_QUEUE_SIZE
+        for i in range(shards):
+            queue = Queue(maxsize)
+            thread = Thread(target=self._sharded, args=(queue,), name='{}_shard_{}'.format(base_name, i))
+            self.__shard_queues.append(queue)
+            self.__shard_threads.append(thread)
+            thread.start()
+
+    def _shard_queue(self, event):
+        # Events without a user all go to the same shard
+        user_id = getattr(event, 'user_id', None)
+        return self.__shard_queues[hash(user_id) % len(self.__shard_queues)]
+
+    def _stop_shards(self):
+        # Events already queued to the shards are processed before they stop
+        for queue in self.__shard_queues:
+            queue.put(None)
+
+        for i, thr in enumerate(self.__shard_threads):
+            self.logger.debug('Waiting for shard thread {0}/{1} to end'.format(i + 1, len(self.__shard_threads)))
+            thr.join()
+
+        self.__shard_queues = []
+        self.__shard_threads = []
+
     def _init_async_threads(self, base_name, workers):
         base_name = '{}_'.format(base_name) if base_name else ''
 
@@ -321,7 +389,7 @@ class Dispatcher(object):
 
         for group in self.groups:
             try:
-                for handler in (x for x in self.handlers[group] if x.check_event(event)):
+                for handler in (x for x in self._get_candidates(group, event) if x.check_event(event)):
                     handler.handle_event(event, self)
                     break
 
@@ -346,6 +414,27 @@ class Dispatcher(object):
             except Exception:
                 self.logger.exception('An uncaught error was raised while processing the event')
 
+    def _get_candidates(self, group, event):
+        """Handlers of ``group`` which accept the types of ``event``, built once per group and types."""
+        if isinstance(event, ViberEvent):
+            key = (group, event.event, event.message.type if event.message else None)
+        else:
+            key = (group, None, None)
+
+        if self.__candidates_version != Handler._types_version:
+            self.__candidates = {}
+            self.__candidates_version = Handler._types_version
+
+        candidates = self.__candidates.get(key)
+        if candidates is None:
+            _, event_type, message_type = key
+            candidates = [handler for handler in self.handlers[group]
+                          if (handler.event_types is None or event_type in handler.event_types) and
+                          (handler.message_types is None or message_type in handler.message_types)]
+            self.__candidates[key] = candidates
+
+        return candidates
+
     def dispatch_error(self, event, error):
         """
         Dispatches an error.
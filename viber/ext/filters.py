@@ -1,10 +1,18 @@
 import re
+import sys
+from timeit import default_timer
 
 from viber.message import MessageType
 
 
 class BaseFilter(object):
     name = None
+    cost = 1
+    """:obj:`int` | :obj:`float`: Cost of the filter relative to a simple check, used by
+    :class:`AdaptiveFilter` to order filters before it measured them."""
+    message_types = None
+    """Tuple[:class:`viber.enums.MessageType`]: Types of the messages the filter can pass, ``None``
+    if it can pass any message."""
 
     def __call__(self, message):
         return self.filter(message)
@@ -28,6 +36,20 @@ class BaseFilter(object):
 
         raise NotImplementedError
 
+    def compile(self):
+        """
+        Flatten this filter and the filters combined into it with ``&``, ``|`` and ``~`` into one
+        generated function, which evaluates them with the same short-circuiting without the
+        nested calls. A filter used more than once in the tree is called at most once per message.
+
+        The function doesn't follow changes made to the tree after it was compiled.
+
+        Returns:
+            :obj:`callable`: Takes the message, returns the same as calling this filter.
+
+        """
+        return _FilterCompiler().compile(self)
+
 
 class InvertedFilter(BaseFilter):
 
@@ -46,6 +68,20 @@ class MergedFilter(BaseFilter):
         self.base_filter = base_filter
         self.and_filter = and_filter
         self.or_filter = or_filter
+        self.message_types = self._merge_message_types()
+
+    def _merge_message_types(self):
+        base_types = getattr(self.base_filter, 'message_types', None)
+        if self.and_filter:
+            other_types = getattr(self.and_filter, 'message_types', None)
+            if base_types is None or other_types is None:
+                return base_types if other_types is None else other_types
+            return tuple(t for t in base_types if t in other_types)
+
+        other_types = getattr(self.or_filter, 'message_types', None)
+        if base_types is None or other_types is None:
+            return None
+        return base_types + tuple(t for t in other_types if t not in base_types)
 
     def filter(self, message):
         if self.and_filter:
@@ -58,6 +94,215 @@ class MergedFilter(BaseFilter):
                                    self.and_filter or self.or_filter)
 
 
+def _is_inlined(f, cls):
+    return (type(f).__call__ is BaseFilter.__call__ and isinstance(f, cls) and
+            type(f).filter is cls.filter)
+
+
+def _operands(f):
+    """Operands of a plain ``&``, ``|`` or ``~`` node, an empty tuple for other filters."""
+    if _is_inlined(f, MergedFilter) and (f.and_filter or f.or_filter):
+        return f.base_filter, f.and_filter or f.or_filter
+    if _is_inlined(f, InvertedFilter):
+        return f.f,
+    return ()
+
+
+class _FilterCompiler(object):
+    """Generates the source of a function evaluating a filter tree and executes it."""
+
+    # Assignment expressions keep the result of a filter used more than once
+    reuse_results = sys.version_info >= (3, 8)
+
+    def __init__(self):
+        self.namespace = {'_UNSET': object()}
+        self.names = {}
+        self.uses = {}
+
+    def _count(self, f):
+        operands = _operands(f)
+        if operands:
+            for operand in operands:
+                self._count(operand)
+        else:
+            self.uses[id(f)] = self.uses.get(id(f), 0) + 1
+
+    def _expression(self, f):
+        operands = _operands(f)
+        if len(operands) == 2:
+            return '({0} {1} {2})'.format(self._expression(operands[0]), 'and' if f.and_filter else 'or',
+                                          self._expression(operands[1]))
+        if operands:
+            return '(not {0})'.format(self._expression(operands[0]))
+
+        name = self.names.get(id(f))
+        if name is None:
+            name = self.names[id(f)] = 'f{0}'.format(len(self.names))
+            # Skip BaseFilter.__call__ for plain filters
+            if isinstance(f, BaseFilter) and type(f).__call__ is BaseFilter.__call__:
+                self.namespace[name] = f.filter
+            else:
+                self.namespace[name] = f
+
+        if self.reuse_results and self.uses[id(f)] > 1:
+            return '(r{0} if r{0} is not _UNSET else (r{0} := {0}(message)))'.format(name)
+        return '{0}(message)'.format(name)
+
+    def compile(self, root):
+        self._count(root)
+        expression = self._expression(root)
+
+        lines = ['def compiled_filter(message):']
+        reused = ['r' + self.names[key] for key, uses in self.uses.items() if uses > 1]
+        if self.reuse_results and reused:
+            lines.append('    {0} = _UNSET'.format(' = '.join(sorted(reused))))
+        lines.append('    return {0}'.format(expression))
+        source = '\n'.join(lines) + '\n'
+
+        exec(compile(source, '<filter {0!r}>'.format(root), 'exec'), self.namespace)
+        compiled_filter = self.namespace['compiled_filter']
+        compiled_filter.source = source
+        return compiled_filter
+
+
+class _AdaptiveNode(object):
+    """A node of :class:`AdaptiveFilter`: an n-ary 'and' / 'or', a 'not' or a 'leaf' filter."""
+
+    def __init__(self, op, children=None, f=None):
+        self.op = op
+        self.children = children or []
+        self.f = f
+        self.calls = 0
+        self.passes = 0
+        self.elapsed = 0.
+
+    @classmethod
+    def from_filter(cls, f):
+        operands = _operands(f)
+        if len(operands) == 2:
+            op = 'and' if f.and_filter else 'or'
+            children = []
+            for operand in operands:
+                child = cls.from_filter(operand)
+                # a & (b & c) is a & b & c
+                children.extend(child.children if child.op == op else [child])
+            return cls(op, children)
+        if operands:
+            return cls('not', [cls.from_filter(operands[0])])
+        return cls('leaf', f=f)
+
+    @property
+    def declared_cost(self):
+        if self.op == 'leaf':
+            return getattr(self.f, 'cost', BaseFilter.cost)
+        return sum(child.declared_cost for child in self.children)
+
+    def rank(self, op, deterministic):
+        """Sort key of the node among the operands of an ``op`` node, the lower the earlier."""
+        if deterministic:
+            return self.declared_cost
+        if not self.calls:
+            # Move operands never reached to the front to measure them
+            return 0.
+
+        cost = self.elapsed / self.calls
+        pass_rate = float(self.passes) / self.calls
+        # Cheap operands deciding the result most often go first
+        decides = 1 - pass_rate if op == 'and' else pass_rate
+        return cost / max(decides, 1e-3)
+
+    def reorder(self, deterministic):
+        for child in self.children:
+            child.reorder(deterministic)
+        if self.op in ('and', 'or'):
+            # sorted() is stable, ties keep the written order
+            self.children = sorted(self.children, key=lambda child: child.rank(self.op, deterministic))
+
+    def evaluate(self, message, timed):
+        start = default_timer() if timed else 0
+        if self.op == 'leaf':
+            result = bool(self.f(message))
+        elif self.op == 'not':
+            result = not self.children[0].evaluate(message, timed)
+        elif self.op == 'and':
+            result = all(child.evaluate(message, timed) for child in self.children)
+        else:
+            result = any(child.evaluate(message, timed) for child in self.children)
+
+        self.calls += 1
+        if result:
+            self.passes += 1
+        if timed:
+            self.elapsed += default_timer() - start
+        return result
+
+    def stats(self, timed):
+        stats = {'filter': repr(self.f) if self.op == 'leaf' else self.op,
+                 'calls': self.calls,
+                 'passes': self.passes,
+                 'pass_rate': float(self.passes) / self.calls if self.calls else None,
+                 'cost': self.elapsed / self.calls if timed and self.calls else None,
+                 'declared_cost': self.declared_cost}
+        if self.op != 'leaf':
+            stats['operands'] = [child.stats(timed) for child in self.children]
+        return stats
+
+
+class AdaptiveFilter(BaseFilter):
+    """
+    Filter evaluating the operands of the ``&`` and ``|`` in a filter tree in the order which
+    decides the result the soonest, instead of the order they were written in. Every operand's
+    time per call and pass rate are measured, and every :attr:`interval` messages the operands of
+    an ``&`` are reordered to run cheap operands which often reject first, and the operands of a
+    ``|`` to run cheap operands which often pass first.
+
+    In the deterministic mode nothing is timed. The operands are ordered once by their declared
+    :attr:`BaseFilter.cost`, keeping the written order between operands with equal costs.
+
+    Note:
+        The operands must not depend on being called in the written order. The filter returns a
+        :obj:`bool` rather than the value of the operand which decided it.
+
+    Args:
+        f (:class:`BaseFilter`): The filter tree.
+        deterministic (:obj:`bool`, optional): Order by declared cost only. Defaults to ``False``.
+        interval (:obj:`int`, optional): Messages between two reorderings. Defaults to 1000.
+
+    """
+
+    def __init__(self, f, deterministic=False, interval=1000):
+        self.f = f
+        self.deterministic = deterministic
+        self.interval = interval
+        self.message_types = getattr(f, 'message_types', None)
+        self.name = 'adaptive {!r}'.format(f)
+
+        self._root = _AdaptiveNode.from_filter(f)
+        self._root.reorder(True)
+        self._countdown = interval
+
+    def filter(self, message):
+        result = self._root.evaluate(message, not self.deterministic)
+
+        if not self.deterministic:
+            self._countdown -= 1
+            if self._countdown <= 0:
+                self._countdown = self.interval
+                self._root.reorder(False)
+
+        return result
+
+    def stats(self):
+        """
+        Returns:
+            :obj:`dict`: Calls, passes, pass rate and seconds per call (``None`` in the
+            deterministic mode) of the tree and of its operands in their current order, nested
+            under 'operands'.
+
+        """
+        return self._root.stats(not self.deterministic)
+
+
 class Filters(object):
 
     class _All(BaseFilter):
@@ -88,6 +333,8 @@ class Filters(object):
     """:obj:`Filter`: Messages starting with ``/``."""
 
     class regex(BaseFilter):
+        cost = 10
+
         def __init__(self, pattern):
             self.pattern = re.compile(pattern)
             self.name = 'Filters.regex({})'.format(self.pattern)
@@ -102,6 +349,7 @@ class Filters(object):
 
     class _File(BaseFilter):
         name = 'Filters.file'
+        message_types = (MessageType.file,)
 
         def filter(self, message):
             return message.type is MessageType.file
@@ -110,6 +358,7 @@ class Filters(object):
 
     class _Picture(BaseFilter):
         name = 'Filters.picture'
+        message_types = (MessageType.picture,)
 
         def filter(self, message):
             return message.type is MessageType.picture
@@ -118,6 +367,7 @@ class Filters(object):
 
     class _Sticker(BaseFilter):
         name = 'Filters.sticker'
+        message_types = (MessageType.sticker,)
 
         def filter(self, message):
             return message.type is MessageType.sticker
@@ -126,6 +376,7 @@ class Filters(object):
 
     class _Video(BaseFilter):
         name = 'Filters.video'
+        message_types = (MessageType.video,)
 
         def filter(self, message):
             return message.type is MessageType.video
@@ -134,6 +385,7 @@ class Filters(object):
 
     class _Contact(BaseFilter):
         name = 'Filters.contact'
+        message_types = (MessageType.contact,)
 
         def filter(self, message):
             return message.type is MessageType.contact
@@ -142,6 +394,7 @@ class Filters(object):
 
     class _Location(BaseFilter):
         name = 'Filters.location'
+        message_types = (MessageType.location,)
 
         def filter(self, message):
             return message.type == MessageType.location
@@ -150,6 +403,7 @@ class Filters(object):
 
     class _Url(BaseFilter):
         name = 'Filters.url'
+        message_types = (MessageType.url,)
 
         def filter(self, message):
             return message.type == MessageType.url
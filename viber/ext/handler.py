@@ -1,6 +1,22 @@
+from threading import local
 
 
 class Handler(object):
+    event_types = None
+    """Tuple[:class:`viber.enums.EventType`]: Types of the events this handler can accept, ``None``
+    for any event. The dispatcher doesn't call :meth:`check_event` for other events."""
+    message_types = None
+    """Tuple[:class:`viber.enums.MessageType`]: Types of the messages this handler can accept,
+    ``None`` for any message."""
+
+    _types_version = 0
+
+    @staticmethod
+    def types_changed():
+        """Tell dispatchers that :attr:`event_types` or :attr:`message_types` of a handler
+        changed, so they rebuild their index of handlers by type."""
+        Handler._types_version += 1
+
     def __init__(self,
                  callback,
                  pass_event_queue=False,
@@ -17,6 +33,23 @@ class Handler(object):
     def handle_event(self, event, bot):
         raise NotImplementedError
 
+    def _set_check_result(self, event, result):
+        """Keep what :meth:`check_event` found for ``event``, for the :meth:`handle_event` which
+        follows it on the same thread."""
+        try:
+            results = self._check_results
+        except AttributeError:
+            results = self.__dict__.setdefault('_check_results', local())
+        results.event = event
+        results.result = result
+
+    def _get_check_result(self, event):
+        """The result stored by :meth:`_set_check_result` for ``event``, or ``None``."""
+        results = getattr(self, '_check_results', None)
+        if results is not None and getattr(results, 'event', None) is event:
+            return results.result
+        return None
+
     def collect_optional_args(self, dispatcher, event=None):
         optional_args = dict()
 
@@ -1,8 +1,11 @@
+from viber.enums import EventType
 from viber.event import Event
+from viber.ext.filters import BaseFilter
 from .handler import Handler
 
 
 class MessageHandler(Handler):
+    event_types = (EventType.message,)
 
     def __init__(self,
                  filters,
@@ -19,6 +22,20 @@ class MessageHandler(Handler):
 
         self.filters = filters
 
+    @property
+    def filters(self):
+        """:class:`viber.ext.filters.BaseFilter` | :obj:`callable`: Filters of the messages, setting
+        them compiles them again and updates :attr:`message_types`."""
+        return self._filters
+
+    @filters.setter
+    def filters(self, filters):
+        self._filters = filters
+        self.message_types = getattr(filters, 'message_types', None) if filters else None
+        # Filter trees are flattened once, checking an event is then a single call
+        self._filter = filters.compile() if isinstance(filters, BaseFilter) else filters
+        Handler.types_changed()
+
     def check_event(self, event):
         if isinstance(event, Event) and event.message:
             if not self.filters:
@@ -26,7 +43,7 @@ class MessageHandler(Handler):
 
             else:
                 message = event.message
-                res = self.filters(message)
+                res = self._filter(message)
         else:
             res = False
 
@@ -2,11 +2,14 @@ import re
 
 from future.utils import string_types
 
+from viber.enums import EventType
 from viber.event import Event
 from .handler import Handler
 
 
 class RegexHandler(Handler):
+    event_types = (EventType.message,)
+
     def __init__(self,
                  pattern,
                  callback,
@@ -33,13 +36,15 @@ class RegexHandler(Handler):
         if not isinstance(event, Event) or event.message is None or event.message.text is None:
             return False
 
-        match = re.match(self.pattern, event.message.text)
+        match = self.pattern.match(event.message.text)
+        if match:
+            self._set_check_result(event, match)
 
         return bool(match)
 
     def handle_event(self, event, dispatcher):
         optional_args = self.collect_optional_args(dispatcher, event)
-        match = re.match(self.pattern, event.message.text)
+        match = self._get_check_result(event) or self.pattern.match(event.message.text)
 
         if self.pass_groups:
             optional_args['groups'] = match.groups()
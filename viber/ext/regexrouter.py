@@ -0,0 +1,206 @@
+"""This module contains the RegexRouter class."""
+import re
+
+from viber.enums import EventType
+from viber.event import Event
+from viber.ext.handler import Handler
+from viber.ext.regexhandler import RegexHandler
+
+# Patterns which can't be put inside a bigger pattern: global inline flags, and backreferences
+# and numbered conditionals, which would point at the wrong group once the groups are renumbered
+_NOT_COMBINABLE = re.compile(r'\(\?[aiLmsux]+\)|\\[1-9]|\(\?P=|\(\?\(\d+\)')
+
+
+class _HandlerMatch(object):
+    """The part of a match of the combined pattern which belongs to one handler's pattern."""
+
+    def __init__(self, match, offset, pattern):
+        self._match = match
+        self._offset = offset
+        self._pattern = pattern
+
+    def group(self, *groups):
+        groups = [g + self._offset if isinstance(g, int) else g for g in (groups or (0,))]
+        return self._match.group(*groups)
+
+    def groups(self, default=None):
+        return tuple(self._match.group(i) if self._match.group(i) is not None else default
+                     for i in range(self._offset + 1, self._offset + self._pattern.groups + 1))
+
+    def groupdict(self, default=None):
+        return dict((name, self._match.group(name) if self._match.group(name) is not None else default)
+                    for name in self._pattern.groupindex)
+
+
+class _Segment(object):
+    """Consecutive patterns compiled into one alternation, or a single pattern used as it is."""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        # Group number of the group wrapping each pattern -> (handler, offset of its groups)
+        self.wrappers = {}
+
+        if len(handlers) == 1:
+            self.pattern = handlers[0].pattern
+            return
+
+        sources = []
+        group = 0
+        for handler in handlers:
+            group += 1
+            self.wrappers[group] = (handler, group)
+            sources.append('({0})'.format(handler.pattern.pattern))
+            group += handler.pattern.groups
+
+        self.pattern = re.compile('|'.join(sources), handlers[0].pattern.flags)
+
+    def match(self, text):
+        match = self.pattern.match(text)
+        if match is None:
+            return None, None
+        if not self.wrappers:
+            return self.handlers[0], match
+
+        # The wrapping group of the pattern which matched is the last one closed
+        handler, offset = self.wrappers[match.lastindex]
+        return handler, _HandlerMatch(match, offset, handler.pattern)
+
+
+class RegexRouter(Handler):
+    """
+    Handler which checks the patterns of many :class:`viber.ext.regexhandler.RegexHandler` in a
+    single pass. The patterns are compiled into one alternation, which the regex engine tries in
+    the order the handlers were added, so the first handler whose pattern matches the text
+    handles the event, as if the handlers were added one after another to the same dispatcher
+    group. The handler gets its own ``groups`` and ``groupdict``.
+
+    Patterns with backreferences, numbered conditionals or global inline flags, with other flags
+    than the patterns before them or with names of groups already used are started in a new
+    alternation, which is tried after the previous one.
+
+    Args:
+        handlers (List[:class:`viber.ext.regexhandler.RegexHandler`], optional): Handlers to route
+            to, in order of priority.
+
+    """
+    event_types = (EventType.message,)
+
+    def __init__(self, handlers=None):
+        super(RegexRouter, self).__init__(None)
+
+        self.handlers = []
+        self._segments = None
+
+        for handler in (handlers or []):
+            self.add_handler(handler)
+
+    def add_handler(self, handler):
+        """
+        Args:
+            handler (:class:`viber.ext.regexhandler.RegexHandler`): A RegexHandler instance.
+
+        """
+        if not isinstance(handler, RegexHandler):
+            raise TypeError('handler is not an instance of {0}'.format(RegexHandler.__name__))
+
+        self.handlers.append(handler)
+        self._segments = None
+
+    def add_pattern(self, pattern, callback, **kwargs):
+        """
+        Shortcut for ``add_handler(RegexHandler(pattern, callback, **kwargs))``.
+
+        Returns:
+            :class:`viber.ext.regexhandler.RegexHandler`: The created handler.
+
+        """
+        handler = RegexHandler(pattern, callback, **kwargs)
+        self.add_handler(handler)
+        return handler
+
+    def remove_handler(self, handler):
+        """
+        Args:
+            handler (:class:`viber.ext.regexhandler.RegexHandler`): A RegexHandler instance.
+
+        """
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+            self._segments = None
+
+    def _compile(self):
+        segments = []
+        handlers = []
+        names = set()
+
+        for handler in self.handlers:
+            pattern = handler.pattern
+            if _NOT_COMBINABLE.search(pattern.pattern):
+                if handlers:
+                    segments.extend(self._compile_segment(handlers))
+                    handlers = []
+                    names = set()
+                segments.append(_Segment([handler]))
+                continue
+
+            if handlers and (pattern.flags != handlers[0].pattern.flags or names.intersection(pattern.groupindex)):
+                segments.extend(self._compile_segment(handlers))
+                handlers = []
+                names = set()
+
+            handlers.append(handler)
+            names.update(pattern.groupindex)
+
+        if handlers:
+            segments.extend(self._compile_segment(handlers))
+
+        return segments
+
+    @staticmethod
+    def _compile_segment(handlers):
+        try:
+            return [_Segment(handlers)]
+        except re.error:
+            # Patterns the checks did not catch, such as too many groups
+            return [_Segment([handler]) for handler in handlers]
+
+    def find(self, text):
+        """
+        Args:
+            text (:obj:`str`): Text of a message.
+
+        Returns:
+            (:class:`viber.ext.regexhandler.RegexHandler`, match): The first handler whose pattern
+            matches ``text`` and the match of its pattern, or ``(None, None)``.
+
+        """
+        segments = self._segments
+        if segments is None:
+            segments = self._segments = self._compile()
+
+        for segment in segments:
+            handler, match = segment.match(text)
+            if handler is not None:
+                return handler, match
+
+        return None, None
+
+    def check_event(self, event):
+        if not isinstance(event, Event) or event.message is None or event.message.text is None:
+            return False
+
+        handler, match = self.find(event.message.text)
+        if handler is None:
+            return False
+
+        handler._set_check_result(event, match)
+        self._set_check_result(event, handler)
+        return True
+
+    def handle_event(self, event, dispatcher):
+        handler = self._get_check_result(event)
+        if handler is None:
+            handler, match = self.find(event.message.text)
+            handler._set_check_result(event, match)
+
+        return handler.handle_event(event, dispatcher)
@@ -4,6 +4,7 @@ from viber.ext.handler import Handler
 
 
 class SubscribedHandler(Handler):
+    event_types = (EventType.subscribed,)
 
     def __init__(self,
                  callback,
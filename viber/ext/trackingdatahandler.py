@@ -3,6 +3,7 @@ import re
 
 from future.utils import string_types
 
+from viber.enums import EventType
 from viber.event import Event
 from .handler import Handler
 
@@ -12,6 +13,8 @@ class TrackingDataHandler(Handler):
     Note:
         Not working when user send's picture.
     """
+    event_types = (EventType.message,)
+
     def __init__(self,
                  callback,
                  filters=None,
@@ -40,7 +43,10 @@ class TrackingDataHandler(Handler):
         if isinstance(event, Event) and event.message and event.message.tracking_data:
             
             if self.pattern:
-                match = bool(re.match(self.pattern, event.message.tracking_data))
+                match = self.pattern.match(event.message.tracking_data)
+                if match:
+                    self._set_check_result(event, match)
+                match = bool(match)
             else:
                 match = True
 
@@ -59,7 +65,7 @@ class TrackingDataHandler(Handler):
 
         optional_args = self.collect_optional_args(dispatcher, update)
         if self.pattern:
-            match = re.match(self.pattern, update.message.tracking_data)
+            match = self._get_check_result(update) or self.pattern.match(update.message.tracking_data)
 
             if self.pass_groups:
                 optional_args['groups'] = match.groups()
@@ -4,6 +4,7 @@ from viber.ext.handler import Handler
 
 
 class UnsubscribedHandler(Handler):
+    event_types = (EventType.unsubscribed,)
 
     def __init__(self,
                  callback,
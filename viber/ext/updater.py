@@ -8,16 +8,17 @@ from signal import SIGINT, SIGTERM, SIGABRT, signal
 from threading import Thread, current_thread, Lock, Event
 from time import sleep
 
-from queue import Queue
-
 from viber.bot import Bot
 from viber.enums import EventType
 from viber.error import ViberError, RetryAfter, TimedOut, InvalidToken
 from viber.ext.dispatcher import Dispatcher
 from viber.ext.jobqueue import JobQueue
+from viber.utils.dedup import EventDeduplicator, DEFAULT_DEDUP_WINDOW, DEFAULT_DEDUP_SIZE
+from viber.utils.eventqueue import EventQueue, OverflowPolicy
 from viber.utils.helpers import get_enum, get_signal_name
+from viber.utils.mediacache import MediaCache
 from viber.utils.request import Request
-from viber.utils.webhookhandler import WebhookServer, WebhookHandler
+from viber.utils.webhookhandler import WebhookServer, WebhookHandler, ThreadPoolWebhookServer
 
 
 class Updater(object):
@@ -34,7 +35,7 @@ class Updater(object):
     Attributes:
         bot (:class:`viber.Bot`): The bot used with this Updater.
         user_sig_handler (:obj:`signal`): signals the updater will respond to.
-        event_queue (:obj:`Queue`): Queue for the events.
+        event_queue (:class:`viber.utils.eventqueue.EventQueue`): Queue for the events.
         job_queue (:class:`viber.ext.JobQueue`): Jobqueue for the updater.
         dispatcher (:class:`viber.ext.Dispatcher`): Dispatcher that handles the updates and dispatches them to the
             handlers.
@@ -57,6 +58,13 @@ class Updater(object):
             `viber.utils.request.Request` object (ignored if `bot` argument is used). The
             request_kwargs are very useful for the advanced users who would like to control the
             default timeouts and/or control the proxy used for http communication.
+        event_queue_size (:obj:`int`, optional): Maximum number of events waiting for the
+            dispatcher, ``0`` (the default) for no limit.
+        overflow (:class:`viber.utils.eventqueue.OverflowPolicy` | :obj:`str`, optional): What
+            the webhook does with events while the queue is full. Defaults to 'block'.
+        spill_path (:obj:`str`, optional): Spill file for the 'spill' overflow policy.
+        shards (:obj:`int`, optional): Passed to :class:`viber.ext.Dispatcher`, handles the
+            events of different users in parallel in this many threads.
 
     Note:
         You must supply either a :attr:`bot` or a :attr:`token` arguments.
@@ -74,7 +82,11 @@ class Updater(object):
                  workers=4,
                  bot=None,
                  user_sig_handler=None,
-                 request_kwargs=None):
+                 request_kwargs=None,
+                 event_queue_size=0,
+                 overflow=OverflowPolicy.block,
+                 spill_path=None,
+                 shards=None):
 
         if bot is None and token is None:
             raise ValueError('`token` or `bot` must be passed')
@@ -98,7 +110,7 @@ class Updater(object):
             self.bot = Bot(token, name, avatar, base_url, request=self._request)
 
         self.user_sig_handler = user_sig_handler
-        self.event_queue = Queue()
+        self.event_queue = EventQueue(event_queue_size, overflow, self.bot, spill_path)
         self.job_queue = JobQueue(self.bot)
         self.logger = logging.getLogger(__name__)
         self.__exception_event = Event()
@@ -106,7 +118,8 @@ class Updater(object):
                                      self.event_queue,
                                      job_queue=self.job_queue,
                                      workers=workers,
-                                     exception_event=self.__exception_event)
+                                     exception_event=self.__exception_event,
+                                     shards=shards)
 
         self.running = False
         self.is_idle = False
@@ -138,7 +151,12 @@ class Updater(object):
                       webhook_url=None,
                       event_types=None,
                       media_url='/media',
-                      media_path=None):
+                      media_path=None,
+                      webhook_workers=None,
+                      keep_alive_timeout=None,
+                      dedup_window=DEFAULT_DEDUP_WINDOW,
+                      dedup_size=DEFAULT_DEDUP_SIZE,
+                      media_cache_size=0):
         """
         Starts a small http server to listen for events via webhook. If cert
         and key are not provided, the webhook will be started directly on
@@ -157,6 +175,16 @@ class Updater(object):
             event_types (List[:obj:`str`], optional): Passed to :attr:`viber.Bot.set_webhook`.
             media_url (:obj:`str`, optional): Url path for giving media to GET requests
             media_path  (:obj:`str`, optional): Path to folder containing media files for giving them to GET requests.
+            webhook_workers (:obj:`int`, optional): Handle webhook requests concurrently in a pool of this many
+                threads. By default requests are handled one at a time.
+            keep_alive_timeout (:obj:`int` | :obj:`float`, optional): Seconds an idle HTTP/1.1 connection is kept
+                open. ``0`` closes the connection after every response. Defaults to ``5`` with ``webhook_workers``
+                and to ``0`` without, where one idle connection would hold up all other requests.
+            dedup_window (:obj:`int` | :obj:`float`, optional): Seconds an event's message token is remembered to
+                drop the events Viber delivers again. ``0`` disables the check. Default ``300``.
+            dedup_size (:obj:`int`, optional): Maximum number of remembered events. Default ``10000``.
+            media_cache_size (:obj:`int`, optional): Bytes of media files kept in memory to serve the files
+                fetched over and over without reading them again. Default ``0``, no cache.
 
         Returns:
             :obj:`Queue`: The event queue that can be filled from the main thread.
@@ -177,7 +205,9 @@ class Updater(object):
 
                 self.job_queue.start()
                 self._init_thread(self.dispatcher.start, "dispatcher"),
-                self._init_thread(self._start_webhook, "updater", listen, port, url_path, media_url, media_path)
+                self._init_thread(self._start_webhook, "updater", listen, port, url_path, media_url, media_path,
+                                  webhook_workers, keep_alive_timeout, dedup_window, dedup_size,
+                                  media_cache_size)
 
                 use_ssl = cert is not None and key is not None
                 if use_ssl:
@@ -194,12 +224,23 @@ class Updater(object):
                 # Return the event queue so the main thread can insert updates
                 return self.event_queue
 
-    def _start_webhook(self, listen, port, url_path, media_url='/media', media_path=None):
+    def _start_webhook(self, listen, port, url_path, media_url='/media', media_path=None, workers=None,
+                       keep_alive_timeout=None, dedup_window=DEFAULT_DEDUP_WINDOW,
+                       dedup_size=DEFAULT_DEDUP_SIZE, media_cache_size=0):
 
         if not url_path.startswith('/'):
             url_path = '/{0}'.format(url_path)
 
-        self.httpd = WebhookServer((listen, port), WebhookHandler, self.event_queue, url_path, self.bot, media_url, media_path)
+        deduplicator = EventDeduplicator(dedup_window, dedup_size) if dedup_window else None
+        media_cache = MediaCache(media_cache_size) if media_cache_size else None
+
+        if workers:
+            self.httpd = ThreadPoolWebhookServer((listen, port), WebhookHandler, self.event_queue, url_path, self.bot,
+                                                 media_url, media_path, keep_alive_timeout, deduplicator,
+                                                 media_cache, workers=workers)
+        else:
+            self.httpd = WebhookServer((listen, port), WebhookHandler, self.event_queue, url_path, self.bot, media_url,
+                                       media_path, keep_alive_timeout, deduplicator, media_cache)
         self.logger.debug('Updater thread started (webhook) on "{}"'.format(url_path))
 
         self.httpd.serve_forever(poll_interval=1)
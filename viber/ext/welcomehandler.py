@@ -4,6 +4,7 @@ from viber.ext.handler import Handler
 
 
 class WelcomeHandler(Handler):
+    event_types = (EventType.conversation_started,)
 
     def __init__(self,
                  callback,
@@ -15,6 +15,8 @@ class Contact(ViberObject):
            name (:obj:`str`): Contact's name.
 
        """
+    __slots__ = ('name', 'phone_number', '_id_attrs')
+
     def __init__(self, name, phone_number):
         self.name = name
         self.phone_number = phone_number
@@ -46,6 +46,8 @@ class File(ViberObject):
         bot (:obj:`viber.Bot`, optional): Bot to use with shortcut method.
         **kwargs (:obj:`dict`): Arbitrary keyword arguments.
     """
+    __slots__ = ('file_url', 'expires', 'signature', 'key_pair_id', 'file_name', 'size', 'bot',
+                 '_id_attrs')
 
     def __init__(self, file_url, expires, signature, key_pair_id, file_name=None, size=None, bot=None, **kwargs):
 
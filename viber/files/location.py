@@ -15,6 +15,7 @@ class Location(ViberObject):
           lon (:obj:`float`): Longitude as defined by sender.
 
       """
+    __slots__ = ('lat', 'lon')
 
     def __init__(self, lat, lon):
         self.lat = lat
@@ -35,6 +35,7 @@ class Picture(ViberObject):
         **kwargs (:obj:`dict`): Arbitrary keyword arguments.
 
     """
+    __slots__ = ('file_url', 'expires', 'signature', 'key_pair_id', 'bot', '_id_attrs')
 
     def __init__(self, file_url, expires, signature, key_pair_id, bot=None, **kwargs):
         # Required
@@ -1,6 +1,9 @@
+import copy
+
 from viber import ViberObject
 from viber.enums import InputFieldState, FavoritesMetadataType, KeyboardType
 from viber.error import ApiVersionError
+from viber.utils import codec
 from viber.utils.helpers import get_enum, get_hex
 
 
@@ -163,7 +166,56 @@ class Keyboard(ViberObject):
         else:
             self.favorites_metadata = None
 
+    def __setattr__(self, name, value):
+        if self.frozen:
+            raise AttributeError('Keyboard is frozen')
+        super(Keyboard, self).__setattr__(name, value)
+
+    @property
+    def frozen(self):
+        """:obj:`bool`: Whether the keyboard was frozen by :meth:`freeze`."""
+        return self.__dict__.get('_frozen') is not None
+
+    def freeze(self):
+        """
+        Validate and serialize the keyboard once, for a keyboard which is sent unchanged many
+        times. The send methods of :class:`viber.Bot` copy the cached JSON of a frozen keyboard
+        into the request instead of serializing the keyboard again. A frozen keyboard can't be
+        changed, its :meth:`to_dict` returns a copy of the cached dict.
+
+        Returns:
+            :class:`Keyboard`: This keyboard.
+
+        Raises:
+            TypeError: If the keyboard has no buttons.
+
+        """
+        if self.frozen:
+            return self
+        if len(self.buttons) == 0:
+            raise TypeError("Must be at least one button")
+
+        self.buttons = tuple(self.buttons)
+        data = self.to_dict()
+        self.__dict__['_frozen'] = (data, codec.RawJSON(codec.dumps(data)))
+        return self
+
+    def to_payload(self):
+        """
+        Returns:
+            :obj:`dict` | :class:`viber.utils.codec.RawJSON`: The keyboard as put into a request
+            payload, the cached JSON if it is frozen.
+
+        """
+        if self.frozen:
+            return self._frozen[1]
+        return self.to_dict()
+
     def to_dict(self):
+        if self.frozen:
+            # A copy, so changing it can't put the dict out of sync with the cached JSON
+            return copy.deepcopy(self._frozen[0])
+
         data = dict()
         data['Type'] = self.keyboard_type.value
         if self.bg_color:
@@ -197,4 +249,6 @@ class Keyboard(ViberObject):
         return data
 
     def add_button(self, button):
+        if self.frozen:
+            raise AttributeError('Keyboard is frozen')
         self.buttons.append(button)
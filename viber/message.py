@@ -8,6 +8,9 @@ from viber.utils.helpers import get_enum
 
 
 class Message(ViberObject):
+    __slots__ = ('type', 'text', 'picture', 'thumbnail', 'location', 'contact', 'tracking_data',
+                 'file', 'duration', 'sticker_id', 'reciever', 'bot')
+
     def __init__(self,
                  type,
                  text=None,
@@ -0,0 +1,109 @@
+"""This module contains an object that represents a precompiled message."""
+import re
+from uuid import uuid4
+
+from viber.utils import codec
+
+
+class EncodedPayload(bytes):
+    """JSON encoded payload of one send, which remembers its receiver for rate limiting and the
+    top level values of the payload for building the returned :class:`viber.Message`."""
+
+    def __new__(cls, body, receiver, payload):
+        self = super(EncodedPayload, cls).__new__(cls, body)
+        self.receiver = receiver
+        self.payload = payload
+        return self
+
+
+class MessageTemplate(object):
+    """
+    Message compiled by :meth:`viber.Bot.compile_message` for sending it many times with only the
+    receiver and a few fields changing. The constant parts of the payload are built and encoded
+    once, every send only encodes its own field values.
+
+    Args:
+        bot (:class:`viber.Bot`): The bot sending the message.
+        method (:obj:`str` | :obj:`callable`): Send method to build the message with.
+        fields (List[:obj:`str`]): Arguments of the send method which change per send.
+        **kwargs (:obj:`dict`): The constant arguments of the send method.
+
+    Raises:
+        ValueError: If a field is not used as a value of the payload.
+
+    """
+
+    def __init__(self, bot, method, fields, **kwargs):
+        self.bot = bot
+        self.fields = tuple(fields)
+
+        prefix = 'viber-template-{0}-'.format(uuid4().hex)
+        markers = dict((name, prefix + name) for name in self.fields)
+        kwargs.update(markers)
+
+        self.url, self._payload = bot._build_payload(method, prefix, **kwargs)
+
+        # Top level keys of the payload filled by each field, for the returned message
+        self._keys = dict((key, value[len(prefix):]) for key, value in self._payload.items()
+                          if isinstance(value, str) and value.startswith(prefix))
+
+        body = codec.dumps(self._payload)
+        encoded = dict((codec.dumps(prefix + name), name) for name in self.fields + ('',))
+        # Constant parts alternate with the names of the fields between them
+        self._parts = re.split(b'(' + b'|'.join(re.escape(marker) for marker in encoded) + b')', body)
+        for i in range(1, len(self._parts), 2):
+            self._parts[i] = encoded[self._parts[i]]
+
+        for name in self.fields + ('',):
+            if name not in self._parts[1::2]:
+                raise ValueError('{0} is not a value of the {1} payload'.format(name or 'user_id', self.url))
+
+    def render(self, user_id, **values):
+        """
+        Args:
+            user_id (:obj:`str`): Unique identifier for the target user.
+            **values (:obj:`dict`): A value for every field.
+
+        Returns:
+            :class:`EncodedPayload`: The request body.
+
+        Raises:
+            TypeError: If the value of a field is missing.
+
+        """
+        try:
+            encoded = dict((name, codec.dumps(values[name])) for name in self.fields)
+        except KeyError as e:
+            raise TypeError('Missing value of field {0}'.format(e))
+        encoded[''] = codec.dumps(user_id)
+
+        parts = self._parts
+        body = [parts[0]]
+        for i in range(1, len(parts), 2):
+            body.append(encoded[parts[i]])
+            body.append(parts[i + 1])
+
+        payload = dict(self._payload)
+        for key, name in self._keys.items():
+            payload[key] = values[name] if name else user_id
+
+        return EncodedPayload(b''.join(body), user_id, payload)
+
+    def send(self, user_id, timeout=None, retry=False, **values):
+        """
+        Send the message to ``user_id``.
+
+        Args:
+            user_id (:obj:`str`): Unique identifier for the target user.
+            timeout (:obj:`int` | :obj:`float`, optional): If this value is specified, use it as
+                the read timeout from the server (instead of the one specified during creation of
+                the connection pool).
+            retry (:obj:`bool`, optional): The message is safe to send twice, see
+                :meth:`viber.Bot.send_message`.
+            **values (:obj:`dict`): A value for every field.
+
+        Returns:
+            :class:`viber.Message`: The same as the send method the template was compiled from.
+
+        """
+        return self.bot._post_message(self.url, self.render(user_id, **values), timeout=timeout, retry=retry)
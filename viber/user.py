@@ -22,6 +22,7 @@ class User(ViberObject):
         bot (:class:`viber.Bot`, optional): The Bot to use for instance methods.
 
     """
+    __slots__ = ('id', 'name', 'avatar', 'country', 'language', 'role', 'api_version', 'bot')
 
     def __init__(self, id, name=None, avatar=None, country=None, language=None, role=None, api_version=None, bot=None):
         """
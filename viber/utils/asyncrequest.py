@@ -0,0 +1,173 @@
+from tornado import gen
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest, HTTPClientError
+from tornado.simple_httpclient import HTTPTimeoutError
+
+from viber.error import TimedOut, NetworkError, RetryAfter, ViberError
+from viber.utils.request import BaseRequest
+
+try:
+    # python 2.7
+    from urllib import urlencode
+except ImportError:
+    # python 3.x
+    from urllib.parse import urlencode
+
+
+class AsyncRequest(BaseRequest):
+    """
+    Non blocking counterpart of :class:`viber.utils.request.Request` built on tornado's
+    :class:`tornado.httpclient.AsyncHTTPClient`. It has the same ``post``/``retrieve``/``download``
+    interface and raises the same errors, but every method is a coroutine, so a single event loop
+    can keep thousands of calls in flight.
+
+    Note:
+        The http client is bound to the event loop it is first used in. Use one
+        :class:`AsyncRequest` per event loop.
+
+    Args:
+        token (:obj:`str`): Bot's unique authentication.
+        con_pool_size (:obj:`int`, optional): Maximum number of simultaneous requests, the rest
+            is queued by the http client. Defaults to 100.
+        connect_timeout (:obj:`int` | :obj:`float`, optional): Connect timeout in seconds.
+        read_timeout (:obj:`int` | :obj:`float`, optional): Timeout for the whole request in
+            seconds.
+        rate_limiter (:class:`viber.utils.ratelimiter.RateLimiter`, optional): Throttling of posts,
+            waiting for a turn doesn't block the event loop.
+        retry_policy (:class:`viber.utils.retry.RetryPolicy`, optional): Policy for retrying failed
+            calls. Retrieving files, idempotent API methods and posts marked safe to retry are
+            retried, the backoff doesn't block the event loop.
+
+    """
+
+    def __init__(self, token, con_pool_size=100, connect_timeout=5., read_timeout=5., rate_limiter=None,
+                 retry_policy=None):
+        super(AsyncRequest, self).__init__(token, rate_limiter, retry_policy)
+        self._con_pool_size = con_pool_size
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._client = None
+
+    @property
+    def con_pool_size(self):
+        """The maximum number of simultaneous requests."""
+        return self._con_pool_size
+
+    @property
+    def client(self):
+        """:class:`tornado.httpclient.AsyncHTTPClient`: The http client used for requests."""
+        if self._client is None:
+            self._client = AsyncHTTPClient(force_instance=True, max_clients=self._con_pool_size)
+        return self._client
+
+    def stop(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def _request_wrapper(self, method, url, body=None, headers=None, timeout=None):
+        request = HTTPRequest(url,
+                              method=method,
+                              body=body,
+                              headers=self._headers(headers),
+                              connect_timeout=self._connect_timeout,
+                              request_timeout=timeout if timeout is not None else self._read_timeout)
+
+        try:
+            resp = await self.client.fetch(request, raise_error=False)
+        except HTTPTimeoutError:
+            raise TimedOut()
+        except HTTPClientError as error:
+            raise NetworkError('tornado HTTPClientError {0}'.format(error))
+        except (IOError, OSError) as error:
+            # Connection refused/reset, DNS and SSL errors
+            raise NetworkError('tornado connection error {0}'.format(error))
+
+        if 200 <= resp.code <= 299:
+            # 200-299 range are HTTP success statuses
+            return resp.body
+
+        if resp.code == 599:
+            # Tornado < 6 reports timeouts and connection errors as responses with code 599
+            if isinstance(resp.error, HTTPTimeoutError):
+                raise TimedOut()
+            raise NetworkError('tornado HTTPClientError {0}'.format(resp.error))
+
+        self._check_http_status(resp.code, resp.body, resp.headers.get('Retry-After'))
+
+    async def _retrying(self, retry, func, *args):
+        policy = self._retry_policy
+        if policy is None:
+            return await func(*args)
+
+        policy.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await func(*args)
+            except ViberError as error:
+                if not retry or not policy.should_retry(error, attempt):
+                    raise
+                await gen.sleep(policy.get_backoff(attempt, error))
+                attempt += 1
+
+    async def post(self, url, data, timeout=None, retry=None):
+        """Same as :meth:`viber.utils.request.Request.post`, but awaitable.
+
+        Unlike there, ``retry`` defaults to whether the API method is idempotent according to
+        :attr:`retry_policy` and the result of the last attempt is returned directly.
+        """
+        if retry is None and self._retry_policy is not None:
+            retry = self._retry_policy.is_idempotent(url)
+
+        return await self._retrying(retry, self._post, url, data, timeout)
+
+    async def _post(self, url, data, timeout=None):
+        body = self._encode(data)
+        receiver = self._receiver(data)
+
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                wait = self._rate_limiter.reserve(receiver)
+                if wait:
+                    await gen.sleep(wait)
+
+            try:
+                result = await self._request_wrapper('POST', url,
+                                                     body=body,
+                                                     headers={'Content-Type': 'application/json'},
+                                                     timeout=timeout)
+
+                return self._check_response(result)
+            except RetryAfter as error:
+                if not self._should_backoff(error, attempt):
+                    raise
+                attempt += 1
+
+    async def retrieve(self, url, timeout=None, **params):
+        """Retrieve the contents of a file by its URL.
+
+        Args:
+            url (:obj:`str`): The web location we want to retrieve.
+            timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the
+                timeout of the request (instead of the one specified during creation).
+
+        """
+        if params:
+            url = '{0}{1}{2}'.format(url, '&' if '?' in url else '?', urlencode(params))
+
+        return await self._retrying(True, self._request_wrapper, 'GET', url, None, None, timeout)
+
+    async def download(self, url, filename, timeout=None):
+        """Download a file by its URL.
+
+        Args:
+            url (str): The web location we want to retrieve.
+            filename: The filename within the path to download the file.
+            timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the
+                timeout of the request (instead of the one specified during creation).
+
+        """
+        buf = await self.retrieve(url, timeout=timeout)
+        with open(filename, 'wb') as fobj:
+            fobj.write(buf)
@@ -0,0 +1,172 @@
+"""This module contains the JSON codec used for the payloads of the Viber API.
+
+The fastest installed of orjson, rapidjson and ujson is used, or else the standard library.
+:func:`dumps` always returns UTF-8 :obj:`bytes` and :func:`loads` takes :obj:`bytes` as well as
+:obj:`str`, so payloads go between the network and Python objects without a :obj:`str` copy.
+
+All codecs accept the same values and produce the same compact UTF-8 JSON: enums are encoded
+by their value, dates, times and UUIDs as strings and non string keys of dicts as strings.
+Values a faster codec can't encode, like integers beyond 64 bits, are left to the standard
+library.
+
+The codec can be chosen with the ``VIBER_JSON_CODEC`` environment variable or :func:`use`.
+"""
+import datetime
+import enum
+import json
+import os
+from uuid import UUID, uuid4
+
+BACKENDS = ('orjson', 'rapidjson', 'ujson', 'json')
+
+backend = None
+""":obj:`str`: Name of the codec in use."""
+
+# Placeholders of RawJSON values, unique so they can't collide with the payload's own strings
+_RAW_PLACEHOLDER = 'viber-raw-json-{0}-{{0}}'.format(uuid4().hex)
+
+
+class RawJSON(bytes):
+    """Already encoded JSON, which :func:`dumps` copies into the output as it is when it is a
+    value of the serialized :obj:`dict`."""
+    __slots__ = ()
+
+
+def _default(obj):
+    """Encode the values which not all codecs support natively."""
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError('Object of type {0} is not JSON serializable'.format(type(obj).__name__))
+
+
+def _stdlib_loads(data):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode('utf-8')
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _load(name):
+    if name == 'json':
+        return _stdlib_dumps, _stdlib_loads
+
+    module = __import__(name)
+    if name == 'orjson':
+        # Dates and dataclasses go through _default like for the other codecs
+        option = module.OPT_NON_STR_KEYS | module.OPT_PASSTHROUGH_DATETIME | module.OPT_PASSTHROUGH_DATACLASS
+        module_dumps = lambda obj: module.dumps(obj, default=_default, option=option)
+    else:
+        module_dumps = lambda obj: module.dumps(obj, default=_default, ensure_ascii=False).encode('utf-8')
+
+    def dumps(obj):
+        try:
+            return module_dumps(obj)
+        except (TypeError, ValueError, OverflowError):
+            return _stdlib_dumps(obj)
+
+    if name == 'orjson':
+        return dumps, module.loads
+
+    module_loads = module.loads
+
+    def loads(data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        try:
+            return module_loads(data)
+        except (ValueError, OverflowError):
+            return _stdlib_loads(data)
+
+    return dumps, loads
+
+
+def dumps(obj):
+    """
+    Args:
+        obj: A JSON serializable object.
+
+    Returns:
+        :obj:`bytes`: The UTF-8 encoded JSON.
+
+    Raises:
+        TypeError: If ``obj`` can't be serialized.
+
+    """
+    if isinstance(obj, dict):
+        for value in obj.values():
+            if isinstance(value, RawJSON):
+                return _dumps_with_raw(obj)
+    return _dumps(obj)
+
+
+def _dumps_with_raw(obj):
+    raw = {}
+    data = {}
+    for key, value in obj.items():
+        if isinstance(value, RawJSON):
+            placeholder = _RAW_PLACEHOLDER.format(len(raw))
+            raw[placeholder] = value
+            value = placeholder
+        data[key] = value
+
+    result = _dumps(data)
+    for placeholder, value in raw.items():
+        result = result.replace(_dumps(placeholder), value, 1)
+    return result
+
+
+def loads(data):
+    """
+    Args:
+        data (:obj:`bytes` | :obj:`bytearray` | :obj:`memoryview` | :obj:`str`): UTF-8 encoded
+            JSON. orjson parses buffers in place, the other codecs get a copy.
+
+    Returns:
+        The decoded object.
+
+    Raises:
+        ValueError: If ``data`` is not valid JSON.
+
+    """
+    return _loads(data)
+
+
+def use(name=None):
+    """Switch the codec.
+
+    Args:
+        name (:obj:`str`, optional): One of :attr:`BACKENDS`. By default the first of them which is
+            installed.
+
+    Raises:
+        ValueError: If ``name`` is not a known codec.
+        ImportError: If the codec ``name`` is not installed.
+
+    """
+    global backend, _dumps, _loads
+
+    if name and name not in BACKENDS:
+        raise ValueError('Unknown JSON codec {0!r}, expected one of {1}'.format(name, ', '.join(BACKENDS)))
+
+    for candidate in ([name] if name else BACKENDS):
+        try:
+            _dumps, _loads = _load(candidate)
+        except ImportError:
+            if name:
+                raise
+            continue
+
+        backend = candidate
+        return
+
+
+_dumps = _stdlib_dumps
+_loads = _stdlib_loads
+use(os.environ.get('VIBER_JSON_CODEC'))
@@ -0,0 +1,129 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DEFAULT_DEDUP_WINDOW = 300.
+DEFAULT_DEDUP_SIZE = 10000
+
+
+class EventDeduplicator(object):
+    """
+    Index of recently received events, used to drop the callbacks Viber delivers again when the
+    acknowledgement of the first delivery was slow or lost.
+
+    Events are keyed by their type, :attr:`viber.Event.message_token` and
+    :attr:`viber.Event.user_id`, so the delivered and seen callbacks of the same message are not
+    taken for duplicates of each other. Events without a message token are never dropped. A key is
+    forgotten :attr:`window` seconds after it was first seen, or earlier when the index holds
+    :attr:`maxsize` keys and room is needed for a new one.
+
+    Attributes:
+        duplicates (:obj:`int`): Number of duplicate events dropped.
+        evicted (:obj:`int`): Number of keys dropped to make room before their window ended.
+
+    Args:
+        window (:obj:`int` | :obj:`float`, optional): Seconds a key is remembered. Defaults to
+            300.
+        maxsize (:obj:`int`, optional): Maximum number of remembered keys. Defaults to 10000.
+
+    """
+
+    def __init__(self, window=DEFAULT_DEDUP_WINDOW, maxsize=DEFAULT_DEDUP_SIZE):
+        if window <= 0:
+            raise ValueError('window must be positive')
+        if maxsize <= 0:
+            raise ValueError('maxsize must be positive')
+
+        self.window = float(window)
+        self.maxsize = maxsize
+
+        self.duplicates = 0
+        self.evicted = 0
+
+        # Key -> time it was first seen, oldest first
+        self._seen = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key(event):
+        """
+        Args:
+            event (:class:`viber.Event`): An incoming event.
+
+        Returns:
+            :obj:`tuple`: The key of ``event``, or ``None`` if it has no message token.
+
+        """
+        if not event.message_token:
+            return None
+        return event.event, event.message_token, event.user_id
+
+    def is_duplicate(self, event):
+        """Check whether ``event`` was seen within the window and remember it if it wasn't.
+
+        Args:
+            event (:class:`viber.Event`): An incoming event.
+
+        Returns:
+            :obj:`bool`: ``True`` if ``event`` is a duplicate and should be dropped.
+
+        """
+        key = self.key(event)
+        if key is None:
+            return False
+
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+
+            if key in self._seen:
+                self.duplicates += 1
+                return True
+
+            if len(self._seen) >= self.maxsize:
+                self._seen.popitem(last=False)
+                self.evicted += 1
+            self._seen[key] = now
+            return False
+
+    def forget(self, event):
+        """Forget ``event``, so its next delivery is not dropped. Used when the event could not be
+        queued and Viber is asked to deliver it again.
+
+        Args:
+            event (:class:`viber.Event`): An event passed to :meth:`is_duplicate`.
+
+        """
+        key = self.key(event)
+        if key is not None:
+            with self._lock:
+                self._seen.pop(key, None)
+
+    def _expire(self, now):
+        deadline = now - self.window
+        seen = self._seen
+        while seen:
+            key, first_seen = next(iter(seen.items()))
+            if first_seen > deadline:
+                break
+            del seen[key]
+
+    def __len__(self):
+        return len(self._seen)
+
+    def stats(self):
+        """
+        Returns:
+            :obj:`dict`: Index size and counters, for monitoring.
+
+        """
+        with self._lock:
+            return {'size': len(self._seen),
+                    'maxsize': self.maxsize,
+                    'window': self.window,
+                    'duplicates': self.duplicates,
+                    'evicted': self.evicted}
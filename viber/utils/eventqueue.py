@@ -0,0 +1,173 @@
+import enum
+import logging
+import struct
+import tempfile
+
+from queue import Queue, Full
+
+from viber.event import LazyEvent
+from viber.utils import codec
+from viber.utils.helpers import get_enum
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+_LENGTH = struct.Struct('>I')
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    'block' - block the putting (webhook) thread until there is room.
+    'reject' - raise :class:`queue.Full`, the webhook answers 503 and Viber redelivers the event later.
+    'drop_silent' - drop a silent event, the new one if it is silent or else the oldest queued one.
+        Rejects like 'reject' if there is no silent event to drop.
+    'spill' - write the raw event to a spill file and read it back once there is room again.
+        Rejects like 'reject' if the raw event is not known.
+    """
+    block = 'block'
+    reject = 'reject'
+    drop_silent = 'drop_silent'
+    spill = 'spill'
+
+
+class EventQueue(Queue):
+    """
+    Queue for the incoming events, optionally bounded with a policy for what happens when it is
+    full.
+
+    Attributes:
+        overflow (:class:`OverflowPolicy`): What to do with events when the queue is full.
+        dropped (:obj:`int`): Number of silent events dropped.
+        rejected (:obj:`int`): Number of events rejected.
+        spilled (:obj:`int`): Number of events written to the spill file.
+
+    Args:
+        maxsize (:obj:`int`, optional): Maximum number of events kept in memory, ``0`` for an
+            unbounded queue.
+        overflow (:class:`OverflowPolicy` | :obj:`str`, optional): Defaults to 'block'.
+        bot (:class:`viber.Bot`, optional): Bot for events read back from the spill file.
+        spill_path (:obj:`str`, optional): Path of the spill file. Defaults to an anonymous
+            temporary file.
+
+    """
+
+    def __init__(self, maxsize=0, overflow=OverflowPolicy.block, bot=None, spill_path=None):
+        Queue.__init__(self, maxsize)
+        self.overflow = get_enum(overflow, OverflowPolicy, 'overflow')
+        self.bot = bot
+        self.spill_path = spill_path
+
+        self.dropped = 0
+        self.rejected = 0
+        self.spilled = 0
+
+        self._spill_file = None
+        self._spill_pending = 0
+        self._spill_offset = 0
+
+    @property
+    def depth(self):
+        """:obj:`int`: Number of waiting events, including the spilled ones."""
+        with self.mutex:
+            return self._qsize() + self._spill_pending
+
+    def stats(self):
+        """
+        Returns:
+            :obj:`dict`: Queue depth and overflow counters, for monitoring.
+
+        """
+        with self.mutex:
+            return {'depth': self._qsize() + self._spill_pending,
+                    'maxsize': self.maxsize,
+                    'spill_pending': self._spill_pending,
+                    'dropped': self.dropped,
+                    'rejected': self.rejected,
+                    'spilled': self.spilled}
+
+    def put(self, item, block=True, timeout=None, raw=None):
+        """Put an event into the queue, applying the :attr:`overflow` policy when it is full.
+
+        Args:
+            item (:class:`viber.Event`): The event.
+            block (:obj:`bool`, optional): Used by the 'block' policy only.
+            timeout (:obj:`float`, optional): Used by the 'block' policy only.
+            raw (:obj:`bytes`, optional): The JSON the event was decoded from, needed to spill it.
+
+        Raises:
+            :class:`queue.Full`: If the event was rejected.
+
+        """
+        if self.maxsize <= 0 or self.overflow is OverflowPolicy.block:
+            return Queue.put(self, item, block, timeout)
+
+        with self.not_full:
+            # Once spilling, keep spilling until the file is drained to preserve the order
+            if self._qsize() < self.maxsize and not (self._spill_pending and raw is not None):
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+                return
+
+            if self.overflow is OverflowPolicy.drop_silent and self._drop_silent(item):
+                return
+            if self.overflow is OverflowPolicy.spill and raw is not None:
+                self._spill(raw)
+                self.unfinished_tasks += 1
+                return
+
+            self.rejected += 1
+            raise Full
+
+    def _drop_silent(self, item):
+        if getattr(item, 'silent', False):
+            self.dropped += 1
+            return True
+
+        for i, queued in enumerate(self.queue):
+            if getattr(queued, 'silent', False):
+                # The new event takes over the unfinished task of the dropped one
+                del self.queue[i]
+                self._put(item)
+                self.dropped += 1
+                self.not_empty.notify()
+                return True
+
+        return False
+
+    def _spill(self, raw):
+        if self._spill_file is None:
+            if self.spill_path:
+                self._spill_file = open(self.spill_path, 'w+b')
+            else:
+                self._spill_file = tempfile.TemporaryFile()
+
+        self._spill_file.seek(0, 2)
+        self._spill_file.write(_LENGTH.pack(len(raw)))
+        self._spill_file.write(raw)
+        self._spill_pending += 1
+        self.spilled += 1
+
+    def _unspill(self):
+        self._spill_file.seek(self._spill_offset)
+        length, = _LENGTH.unpack(self._spill_file.read(_LENGTH.size))
+        raw = self._spill_file.read(length)
+        self._spill_offset += _LENGTH.size + length
+        self._spill_pending -= 1
+
+        if not self._spill_pending:
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
+            self._spill_offset = 0
+
+        return LazyEvent.from_dict(codec.loads(raw), self.bot)
+
+    def _get(self):
+        item = Queue._get(self)
+        if self._spill_pending:
+            try:
+                self._put(self._unspill())
+            except Exception:
+                logger.exception('Could not read back a spilled event')
+                self.unfinished_tasks -= 1
+        return item
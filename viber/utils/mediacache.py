@@ -0,0 +1,163 @@
+import logging
+import mimetypes
+import os
+from collections import OrderedDict
+from email.utils import formatdate
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class MediaFile(object):
+    """
+    A media file served by :class:`viber.utils.webhookhandler.WebhookHandler`, with the values of
+    its response headers.
+
+    Attributes:
+        path (:obj:`str`): Normalized path of the file.
+        size (:obj:`int`): Size in bytes.
+        mtime (:obj:`float`): Time of the last modification.
+        mtime_ns (:obj:`int`): Time of the last modification in nanoseconds.
+        etag (:obj:`str`): Entity tag, built from :attr:`mtime_ns` and :attr:`size`.
+        last_modified (:obj:`str`): :attr:`mtime` formatted for the Last-Modified header.
+        content_type (:obj:`str`): MIME type guessed from the extension.
+        data (:obj:`bytes`): Contents of the file when it is cached, else ``None``.
+
+    Args:
+        path (:obj:`str`): Normalized path of the file.
+        stat (:obj:`os.stat_result`): Status of the file.
+        data (:obj:`bytes`, optional): Contents of the file.
+
+    """
+    __slots__ = ('path', 'size', 'mtime', 'mtime_ns', 'etag', 'last_modified', 'content_type', 'data')
+
+    def __init__(self, path, stat, data=None):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.mtime_ns = stat.st_mtime_ns
+        self.etag = '"{0:x}-{1:x}"'.format(self.mtime_ns, self.size)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.data = data
+
+    def is_current(self, stat):
+        """:obj:`bool`: Whether the file still has the modification time and size of ``stat``."""
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+class MediaCache(object):
+    """
+    Size bounded LRU cache of the contents of media files, so files fetched over and over are
+    served from memory. Every lookup still stats the file and an entry is read again once the
+    modification time or size of the file changed.
+
+    Attributes:
+        hits (:obj:`int`): Number of lookups served from the cache.
+        misses (:obj:`int`): Number of lookups which read the file.
+        evictions (:obj:`int`): Number of entries dropped to make room.
+
+    Args:
+        max_size (:obj:`int`): Maximum total size in bytes of the cached files.
+        max_file_size (:obj:`int`, optional): Files bigger than this are not cached. Defaults to
+            a quarter of ``max_size``.
+
+    """
+
+    def __init__(self, max_size, max_file_size=None):
+        if max_size <= 0:
+            raise ValueError('max_size must be positive')
+
+        self.max_size = max_size
+        self.max_file_size = min(max_file_size or max_size // 4, max_size)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def get(self, path):
+        """
+        Args:
+            path (:obj:`str`): Normalized path of the file.
+
+        Returns:
+            :class:`MediaFile`: The cached file, or ``None`` if it is too big to be cached.
+
+        Raises:
+            :obj:`OSError`: If the file can't be read.
+
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._discard(path)
+            raise
+
+        with self._lock:
+            media = self._entries.get(path)
+            if media is not None and media.is_current(stat):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return media
+            self.misses += 1
+
+        if stat.st_size > self.max_file_size:
+            self._discard(path)
+            return None
+
+        # Read without holding the lock, the file may change in between so fstat what was read
+        with open(path, 'rb') as f:
+            media = MediaFile(path, os.fstat(f.fileno()), f.read())
+        if media.size != len(media.data) or media.size > self.max_file_size:
+            self._discard(path)
+            return None
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._size -= old.size
+            self._entries[path] = media
+            self._size += media.size
+
+            while self._size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                self.evictions += 1
+
+        return media
+
+    def _discard(self, path):
+        with self._lock:
+            media = self._entries.pop(path, None)
+            if media is not None:
+                self._size -= media.size
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Returns:
+            :obj:`dict`: Cache size and counters, for monitoring.
+
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries),
+                    'size': self._size,
+                    'max_size': self.max_size,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_ratio': float(self.hits) / lookups if lookups else 0.,
+                    'evictions': self.evictions}
@@ -0,0 +1,137 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from viber.constants import MAX_MESSAGES_PER_SECOND, MAX_MESSAGES_PER_SECOND_PER_CHAT
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class TokenBucket(object):
+    """
+    Token bucket which hands out reservations instead of refusing calls. A reservation taken while
+    the bucket is empty puts the bucket in debt and returns how long the caller has to wait, so
+    calls are queued in the order they arrived.
+
+    Note:
+        Not thread safe, :class:`RateLimiter` serializes access to its buckets.
+
+    Args:
+        rate (:obj:`int` | :obj:`float`): Tokens added per second.
+        capacity (:obj:`int` | :obj:`float`, optional): Maximum number of stored tokens, i.e. the
+            allowed burst. Defaults to ``rate`` (but at least one).
+
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1., rate))
+        self._tokens = self.capacity
+        self._updated = time.time()
+
+    def reserve(self, now):
+        """Take one token and return the number of seconds to wait before using it."""
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+        self._tokens -= 1
+        # _updated is in the future while the bucket is paused
+        wait = self._updated - now
+        if self._tokens < 0:
+            wait += -self._tokens / self.rate
+        return wait
+
+    def pause_until(self, until):
+        """Stop refilling the bucket until ``until`` and start it empty from there."""
+        self._tokens = min(self._tokens, 0.)
+        self._updated = max(self._updated, until)
+
+
+class RateLimiter(object):
+    """
+    Global and per receiver throttling for :meth:`viber.utils.request.Request.post`.
+
+    Calls over the limit are delayed rather than failed. When Viber answers with flood control
+    (:class:`viber.error.RetryAfter`) the global bucket is paused for the requested time and the
+    call is queued again, at most :attr:`max_flood_retries` times.
+
+    Attributes:
+        max_flood_retries (:obj:`int`): How many times a call rejected by flood control is queued
+            again before the :class:`viber.error.RetryAfter` is raised to the caller.
+
+    Args:
+        max_per_second (:obj:`int` | :obj:`float`, optional): Global limit of calls per second.
+            Defaults to :attr:`viber.constants.MAX_MESSAGES_PER_SECOND`.
+        max_per_second_per_receiver (:obj:`int` | :obj:`float`, optional): Limit of calls per
+            second to one receiver. Defaults to
+            :attr:`viber.constants.MAX_MESSAGES_PER_SECOND_PER_CHAT`. ``None`` disables it.
+        burst (:obj:`int`, optional): Capacity of the global bucket. Defaults to ``max_per_second``.
+        receiver_burst (:obj:`int`, optional): Capacity of every receiver bucket. Defaults to
+            ``max_per_second_per_receiver``.
+        max_receivers (:obj:`int`, optional): Number of receiver buckets kept, the least recently
+            used ones are dropped first. Defaults to 10000.
+        max_flood_retries (:obj:`int`, optional): Defaults to 3.
+
+    """
+
+    def __init__(self,
+                 max_per_second=MAX_MESSAGES_PER_SECOND,
+                 max_per_second_per_receiver=MAX_MESSAGES_PER_SECOND_PER_CHAT,
+                 burst=None,
+                 receiver_burst=None,
+                 max_receivers=10000,
+                 max_flood_retries=3):
+        self._bucket = TokenBucket(max_per_second, burst)
+        self._receiver_rate = max_per_second_per_receiver
+        self._receiver_burst = receiver_burst
+        self._receivers = OrderedDict()
+        self._max_receivers = max_receivers
+        self._lock = Lock()
+
+        self.max_flood_retries = max_flood_retries
+
+    def _receiver_bucket(self, receiver):
+        bucket = self._receivers.pop(receiver, None)
+        if bucket is None:
+            bucket = TokenBucket(self._receiver_rate, self._receiver_burst)
+            if len(self._receivers) >= self._max_receivers:
+                self._receivers.popitem(last=False)
+        self._receivers[receiver] = bucket
+        return bucket
+
+    def reserve(self, receiver=None):
+        """Reserve a slot for one call and return the number of seconds to wait for it.
+
+        Args:
+            receiver (:obj:`str`, optional): Receiver of the call, if it has a single one.
+
+        Returns:
+            :obj:`float`
+
+        """
+        with self._lock:
+            now = time.time()
+            wait = self._bucket.reserve(now)
+            if receiver is not None and self._receiver_rate:
+                wait = max(wait, self._receiver_bucket(receiver).reserve(now))
+
+        return max(wait, 0.)
+
+    def acquire(self, receiver=None):
+        """Block until a call to ``receiver`` is allowed."""
+        wait = self.reserve(receiver)
+        if wait:
+            logger.debug('Rate limit reached, delaying call for %.3f seconds', wait)
+            time.sleep(wait)
+
+    def backoff(self, retry_after):
+        """Pause all calls for ``retry_after`` seconds, as requested by the server."""
+        logger.info('Flood control exceeded, pausing calls for %s seconds', retry_after)
+        with self._lock:
+            self._bucket.pause_until(time.time() + retry_after)
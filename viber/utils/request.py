@@ -1,21 +1,153 @@
-import json
 import logging
+import math
 import socket
 import sys
+import time
+from email.utils import mktime_tz, parsedate_tz
 
 import certifi
 import urllib3
 from urllib3 import Timeout
 from urllib3.connection import HTTPConnection
 
-from viber.error import TimedOut, NetworkError, ViberError, InvalidToken, Unauthorized, BadRequest, InvalidWebhookUrl
+from viber.utils import codec
+from viber.utils.retry import RetryPromise
+from viber.error import TimedOut, NetworkError, ViberError, InvalidToken, Unauthorized, BadRequest, InvalidWebhookUrl, \
+    RetryAfter
 
 USER_AGENT = 'Python Viber Bot'
+TOO_MANY_REQUESTS_STATUS = 12
+DEFAULT_RETRY_AFTER = 1.
 
 
-class Request(object):
-    def __init__(self, token, con_pool_size=1, connect_timeout=5., read_timeout=5.):
+def _parse_retry_after(value):
+    """
+    Args:
+        value (:obj:`str`): Retry-After header, delay seconds or an HTTP date.
+
+    Returns:
+        :obj:`float`: Seconds to wait, or ``None`` if ``value`` can't be parsed.
+
+    """
+    if not value:
+        return None
+
+    try:
+        delay = float(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        return max(0., delay) if math.isfinite(delay) else None
+
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0., mktime_tz(date) - time.time())
+
+
+class BaseRequest(object):
+    """Transport independent part of the Viber API requests: headers, parsing and error mapping."""
+
+    def __init__(self, token, rate_limiter=None, retry_policy=None):
         self.token = token
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+
+    @property
+    def rate_limiter(self):
+        """:class:`viber.utils.ratelimiter.RateLimiter`: Throttling of posts, if any."""
+        return self._rate_limiter
+
+    @property
+    def retry_policy(self):
+        """:class:`viber.utils.retry.RetryPolicy`: Policy for retrying failed calls, if any."""
+        return self._retry_policy
+
+    @staticmethod
+    def _receiver(data):
+        if isinstance(data, dict):
+            return data.get('receiver')
+        # Encoded payloads may know their receiver, see viber.template.EncodedPayload
+        return getattr(data, 'receiver', None)
+
+    def _should_backoff(self, error, attempt):
+        """Pause the rate limiter for a flood control error, if the call may be queued again."""
+        if self._rate_limiter is None or attempt >= self._rate_limiter.max_flood_retries:
+            return False
+
+        self._rate_limiter.backoff(error.retry_after)
+        return True
+
+    def _headers(self, headers=None):
+        headers = headers or {}
+
+        headers['connection'] = 'keep-alive'
+        headers['X-Viber-Auth-Token'] = self.token
+        # Also set our user agent
+        headers['user-agent'] = USER_AGENT
+
+        return headers
+
+    @staticmethod
+    def _encode(data):
+        """Serialize a request payload, :obj:`bytes` are treated as an already encoded payload."""
+        if isinstance(data, bytes):
+            return data
+        return codec.dumps(data)
+
+    def _parse(self, json_data):
+        try:
+            data = codec.loads(json_data)
+        except UnicodeDecodeError:
+            logging.getLogger(__name__).debug('Logging raw invalid UTF-8 response:\n%r', json_data)
+            raise ViberError('Server response could not be decoded using UTF-8')
+        except ValueError:
+            raise ViberError('Invalid server response')
+
+        return data
+
+    def _check_http_status(self, status, data, retry_after=None):
+        """Raise the matching :class:`viber.error.ViberError` for a non successful HTTP status."""
+        try:
+            message = self._parse(data)
+        except ViberError:
+            message = 'Unknown HTTPError'
+
+        if status in (401, 403):
+            raise Unauthorized(message)
+        elif status == 400:
+            raise BadRequest(message)
+        elif status == 404:
+            raise InvalidToken()
+        elif status == 429:
+            retry_after = _parse_retry_after(retry_after)
+            raise RetryAfter(DEFAULT_RETRY_AFTER if retry_after is None else retry_after)
+        elif status == 502:
+            raise NetworkError('Bad Gateway')
+        else:
+            raise NetworkError('{0} ({1})'.format(message, status))
+
+    def _check_response(self, result):
+        """Parse the body of a successful API call and check the Viber status code of it."""
+        parsed_data = self._parse(result)
+        if isinstance(parsed_data, dict):
+            response_status = parsed_data['status']
+            if response_status == 0:
+                return parsed_data
+            elif response_status == 1:
+                raise InvalidWebhookUrl(parsed_data['status_message'])
+            elif response_status == TOO_MANY_REQUESTS_STATUS:
+                raise RetryAfter(DEFAULT_RETRY_AFTER)
+            else:
+                raise NetworkError('status_message: ' + parsed_data['status_message'])
+        else:
+            return parsed_data
+
+
+class Request(BaseRequest):
+    def __init__(self, token, con_pool_size=1, connect_timeout=5., read_timeout=5., rate_limiter=None,
+                 retry_policy=None):
+        super(Request, self).__init__(token, rate_limiter, retry_policy)
         self._connect_timeout = connect_timeout
 
         sockopts = HTTPConnection.default_socket_options + [
@@ -52,26 +184,8 @@ class Request(object):
     def stop(self):
         self._con_pool.clear()
 
-    def _parse(self, json_data):
-        try:
-            decoded_s = json_data.decode('utf-8')
-            data = json.loads(decoded_s)
-        except UnicodeDecodeError:
-            logging.getLogger(__name__).debug('Logging raw invalid UTF-8 response:\n%r', json_data)
-            raise ViberError('Server response could not be decoded using UTF-8')
-        except ValueError:
-            raise ViberError('Invalid server response')
-
-        return data
-
     def _request_wrapper(self, *args, **kwargs):
-        if 'headers' not in kwargs:
-            kwargs['headers'] = {}
-
-        kwargs['headers']['connection'] = 'keep-alive'
-        kwargs['headers']['X-Viber-Auth-Token'] = self.token
-        # Also set our user agent
-        kwargs['headers']['user-agent'] = USER_AGENT
+        kwargs['headers'] = self._headers(kwargs.get('headers'))
 
         try:
             resp = self._con_pool.request(*args, **kwargs)
@@ -82,49 +196,68 @@ class Request(object):
             # TODO: do something smart here; for now just raise NetworkError
             raise NetworkError('urllib3 HTTPError {0}'.format(error))
 
-
-
         if 200 <= resp.status <= 299:
             # 200-299 range are HTTP success statuses
             return resp.data
 
-        try:
-            message = self._parse(resp.data)
-        except ValueError:
-            message = 'Unknown HTTPError'
+        self._check_http_status(resp.status, resp.data, resp.headers.get('Retry-After'))
 
-        if resp.status in (401, 403):
-            raise Unauthorized(message)
-        elif resp.status == 400:
-            raise BadRequest(message)
-        elif resp.status == 404:
-            raise InvalidToken()
-        elif resp.status == 502:
-            raise NetworkError('Bad Gateway')
-        else:
-            raise NetworkError('{0} ({1})'.format(data, resp.status))
+    def post(self, url, data, timeout=None, retry=False, callback=None):
+        """Post a payload to the Viber API.
 
-    def post(self, url, data, timeout=None):
+        Args:
+            url (:obj:`str`): The API method url.
+            data (:obj:`dict` | :obj:`bytes`): The payload, or an already JSON encoded payload.
+            timeout (:obj:`int` | :obj:`float`): If this value is specified, use it as the read
+                timeout from the server (instead of the one specified during creation of the
+                connection pool).
+            retry (:obj:`bool`, optional): The call is safe to repeat. The first attempt is made
+                right away, failed attempts are retried in the background according to
+                :attr:`retry_policy` and a :class:`viber.utils.retry.RetryPromise` is returned.
+                Other calls are made once, the calling thread never waits for a retry.
+            callback (:obj:`callable`, optional): With ``retry``, applied to the API response to
+                get the result of the returned promise.
+
+        Note:
+            With a :attr:`rate_limiter` the call waits for its turn and is queued again after
+            flood control errors.
+
+        """
+        if self._retry_policy is not None:
+            self._retry_policy.deposit()
+
+        if retry:
+            promise = RetryPromise(self._post, (url, data, timeout), {}, self._retry_policy, callback)
+            promise.run()
+            return promise
+
+        return self._post(url, data, timeout)
+
+    def _post(self, url, data, timeout=None):
         urlopen_kwargs = {}
 
         if timeout is not None:
             urlopen_kwargs['timeout'] = Timeout(read=timeout, connect=self._connect_timeout)
 
-        result = self._request_wrapper('POST', url,
-                                       body=json.dumps(data).encode('utf-8'),
-                                       headers={'Content-Type': 'application/json'})
-
-        parsed_data = self._parse(result)
-        if isinstance(parsed_data, dict):
-            response_status = parsed_data['status']
-            if response_status == 0:
-                return parsed_data
-            elif response_status == 1:
-                raise InvalidWebhookUrl(parsed_data['status_message'])
-            else:
-                raise NetworkError('status_message: ' + parsed_data['status_message'])
-        else:
-            return parsed_data
+        body = self._encode(data)
+        receiver = self._receiver(data)
+
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(receiver)
+
+            try:
+                result = self._request_wrapper('POST', url,
+                                               body=body,
+                                               headers={'Content-Type': 'application/json'},
+                                               **urlopen_kwargs)
+
+                return self._check_response(result)
+            except RetryAfter as error:
+                if not self._should_backoff(error, attempt):
+                    raise
+                attempt += 1
 
     def retrieve(self, url, timeout=None, **params):
         """Retrieve the contents of a file by its URL.
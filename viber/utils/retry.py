@@ -0,0 +1,145 @@
+import logging
+import random
+from threading import Lock, Timer
+
+from viber.error import NetworkError, RetryAfter, BadRequest, InvalidWebhookUrl
+from viber.utils.promise import Promise
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class RetryPolicy(object):
+    """
+    Decides which failed calls are retried and when.
+
+    Transient errors (:class:`viber.error.TimedOut`, :class:`viber.error.RetryAfter` and
+    :class:`viber.error.NetworkError` other than :class:`viber.error.BadRequest` and
+    :class:`viber.error.InvalidWebhookUrl`) are retried after a capped exponential backoff with
+    full jitter. Retries are paid from a budget which is refilled by a fraction of every call, so a
+    failing API can't be flooded with retries.
+
+    Args:
+        max_retries (:obj:`int`, optional): Retries per call. Defaults to 3.
+        backoff_factor (:obj:`float`, optional): Backoff of the first retry in seconds, doubled
+            for every next one. Defaults to 0.5.
+        backoff_max (:obj:`float`, optional): Maximum backoff in seconds. Defaults to 30.
+        jitter (:obj:`bool`, optional): Wait a random time between zero and the backoff.
+            Defaults to ``True``.
+        budget (:obj:`int`, optional): Maximum number of retries stored in the budget.
+            Defaults to 10.
+        budget_ratio (:obj:`float`, optional): Retries earned by every call. Defaults to 0.1.
+        idempotent_methods (List[:obj:`str`], optional): API methods which
+            :class:`viber.utils.asyncrequest.AsyncRequest` retries without being marked safe to
+            retry. :class:`viber.utils.request.Request` only retries posts marked safe to retry,
+            in the background, so the calling thread never waits for a backoff.
+
+    """
+
+    def __init__(self,
+                 max_retries=3,
+                 backoff_factor=.5,
+                 backoff_max=30.,
+                 jitter=True,
+                 budget=10,
+                 budget_ratio=.1,
+                 idempotent_methods=('get_account_info', 'get_user_details', 'get_online')):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.budget = budget
+        self.budget_ratio = budget_ratio
+        self.idempotent_methods = tuple(idempotent_methods)
+
+        self._tokens = float(budget)
+        self._lock = Lock()
+
+    def is_idempotent(self, url):
+        """:obj:`bool`: Whether the API method at ``url`` can be retried without side effects."""
+        return url.rstrip('/').rsplit('/', 1)[-1] in self.idempotent_methods
+
+    @staticmethod
+    def is_retryable(error):
+        """:obj:`bool`: Whether ``error`` is transient."""
+        if isinstance(error, (BadRequest, InvalidWebhookUrl)):
+            return False
+        return isinstance(error, (NetworkError, RetryAfter))
+
+    def deposit(self):
+        """Add the share of one call to the retry budget."""
+        with self._lock:
+            self._tokens = min(self.budget, self._tokens + self.budget_ratio)
+
+    def _withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def should_retry(self, error, attempt):
+        """Whether a call which failed with ``error`` on retry number ``attempt`` is retried.
+
+        Takes the retry from the budget when it returns ``True``.
+        """
+        if attempt >= self.max_retries or not self.is_retryable(error):
+            return False
+
+        if not self._withdraw():
+            logger.warning('Retry budget exhausted, not retrying: %s', error)
+            return False
+
+        return True
+
+    def get_backoff(self, attempt, error=None):
+        """:obj:`float`: Seconds to wait before retry number ``attempt``."""
+        delay = min(self.backoff_max, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if isinstance(error, RetryAfter):
+            delay = max(delay, error.retry_after)
+        return delay
+
+
+class RetryPromise(Promise):
+    """
+    :class:`viber.utils.promise.Promise` which schedules the function again on a timer thread
+    when it fails with an error the policy retries. :attr:`done` is only set by the last attempt,
+    the thread which started the first attempt is never put to sleep.
+
+    Args:
+        pooled_function (:obj:`callable`): The function to call.
+        args (:obj:`tuple`): Arguments to `pooled_function`.
+        kwargs (:obj:`dict`): Keyword arguments to `pooled_function`.
+        policy (:class:`RetryPolicy`, optional): Without a policy the function is run once.
+        callback (:obj:`callable`, optional): Applied to the result of the successful attempt.
+
+    """
+
+    def __init__(self, pooled_function, args, kwargs, policy=None, callback=None):
+        super(RetryPromise, self).__init__(pooled_function, args, kwargs)
+        self.policy = policy
+        self.callback = callback
+        self.attempts = 0
+
+    def run(self):
+        try:
+            result = self.pooled_function(*self.args, **self.kwargs)
+            self._result = self.callback(result) if self.callback is not None else result
+
+        except Exception as exc:
+            if self.policy is not None and self.policy.should_retry(exc, self.attempts):
+                delay = self.policy.get_backoff(self.attempts, exc)
+                self.attempts += 1
+                logger.info('Retry %d of %s in %.2f seconds: %s', self.attempts,
+                            getattr(self.pooled_function, '__name__', self.pooled_function), delay, exc)
+
+                timer = Timer(delay, self.run)
+                timer.daemon = True
+                timer.start()
+                return
+
+            self._exception = exc
+
+        self.done.set()
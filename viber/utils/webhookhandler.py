@@ -1,19 +1,28 @@
+import binascii
 import hashlib
 import hmac
-import json
 import logging
 import os
-from threading import Lock
+from email.utils import mktime_tz, parsedate_tz
+from threading import Lock, Thread, local
 
-from future.utils import bytes_to_native_str
+from queue import Queue, Full
 
-from viber.event import Event
+from viber.event import LazyEvent
+from viber.utils import codec
+from viber.utils.eventqueue import EventQueue
+from viber.utils.mediacache import MediaFile
 
 try:
     import BaseHTTPServer
 except ImportError:
     import http.server as BaseHTTPServer
 
+try:
+    from urllib import unquote
+except ImportError:
+    from urllib.parse import unquote
+
 
 class _InvalidPost(Exception):
 
@@ -22,10 +31,52 @@ class _InvalidPost(Exception):
         super(_InvalidPost, self).__init__()
 
 
+DEFAULT_KEEP_ALIVE_TIMEOUT = 5.
+# Request bodies up to this size are read into a buffer kept per thread
+MAX_REUSED_BUFFER_SIZE = 1 << 20
+
+
+def _parse_range(value, size):
+    """
+    Args:
+        value (:obj:`str`): Range header of a request.
+        size (:obj:`int`): Size of the requested file.
+
+    Returns:
+        (:obj:`int`, :obj:`int`): First and last byte of the range, or ``None`` to send the whole
+        file for ranges which are not understood, including multiple ranges.
+
+    Raises:
+        ValueError: If the range is not satisfiable.
+
+    """
+    unit, _, spec = value.partition('=')
+    first, sep, last = spec.strip().partition('-')
+    if unit.strip().lower() != 'bytes' or not sep or not (first or last).isdigit() or (first and last and not last.isdigit()):
+        return None
+
+    if not first:
+        suffix = int(last)
+        if not suffix or not size:
+            raise ValueError('Unsatisfiable range')
+        return max(0, size - suffix), size - 1
+
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size:
+        raise ValueError('Unsatisfiable range')
+    if last < first:
+        return None
+    return first, last
+
+
 class WebhookServer(BaseHTTPServer.HTTPServer, object):
     ALLOWED_GET_MEDIA_TYPES = ('.png', '.jpg', '.jpeg')
+    # One idle connection would block every other callback of the single thread
+    default_keep_alive_timeout = 0
 
-    def __init__(self, server_address, RequestHandlerClass, event_queue, webhook_path, bot, media_url='/media', media_path=None):
+    def __init__(self, server_address, RequestHandlerClass, event_queue, webhook_path, bot, media_url='/media', media_path=None,
+                 keep_alive_timeout=None, deduplicator=None, media_cache=None):
         super(WebhookServer, self).__init__(server_address, RequestHandlerClass)
         self.logger = logging.getLogger(__name__)
         self.event_queue = event_queue
@@ -33,6 +84,14 @@ class WebhookServer(BaseHTTPServer.HTTPServer, object):
         self.bot = bot
         self.media_url = media_url
         self.media_path = media_path
+        if keep_alive_timeout is None:
+            keep_alive_timeout = self.default_keep_alive_timeout
+        self.keep_alive_timeout = keep_alive_timeout
+        self.deduplicator = deduplicator
+        self.media_cache = media_cache
+        # Keyed once, every request works on a copy
+        self.signature_hmac = hmac.new(bot.token.encode('ascii'), digestmod=hashlib.sha256)
+        self.buffers = local()
 
         self.is_running = False
         self.server_lock = Lock()
@@ -60,62 +119,323 @@ class WebhookServer(BaseHTTPServer.HTTPServer, object):
                           client_address, exc_info=True)
 
 
+class ThreadPoolMixIn(object):
+    """
+    Mix-in class to handle each request in one of a fixed number of worker threads, unlike
+    :class:`socketserver.ThreadingMixIn` which starts a new thread per request. Accepted
+    connections wait in a queue of :attr:`pool_size` entries, when it is full the server stops
+    accepting and new connections wait in the listen backlog.
+    """
+
+    pool_size = 8
+
+    def _start_pool(self, name='webhook'):
+        self._requests = Queue(self.pool_size)
+        self._pool = []
+        for i in range(self.pool_size):
+            thread = Thread(target=self._pool_worker, name='{0}_{1}'.format(name, i))
+            thread.daemon = True
+            self._pool.append(thread)
+            thread.start()
+
+    def _stop_pool(self):
+        for _ in self._pool:
+            self._requests.put(None)
+        for thread in self._pool:
+            thread.join()
+        self._pool = []
+
+    def _pool_worker(self):
+        while 1:
+            item = self._requests.get()
+            if item is None:
+                break
+            self.process_request_thread(*item)
+
+    def process_request_thread(self, request, client_address):
+        """Same as in :class:`socketserver.ThreadingMixIn`, run by a worker thread."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        """Hand the request to the pool."""
+        self._requests.put((request, client_address))
+
+
+class ThreadPoolWebhookServer(ThreadPoolMixIn, WebhookServer):
+    """
+    :class:`WebhookServer` which handles requests concurrently, so one slow client or TLS
+    handshake doesn't stall the other callbacks. Events are still fed to the same event queue.
+    Connections are kept alive for :data:`DEFAULT_KEEP_ALIVE_TIMEOUT` seconds by default.
+
+    Args:
+        *args: Same as for :class:`WebhookServer`.
+        workers (:obj:`int`, optional): Number of worker threads. Defaults to
+            :attr:`ThreadPoolMixIn.pool_size`.
+        **kwargs: Same as for :class:`WebhookServer`.
+    """
+    default_keep_alive_timeout = DEFAULT_KEEP_ALIVE_TIMEOUT
+
+    def __init__(self, *args, **kwargs):
+        workers = kwargs.pop('workers', None)
+        if workers:
+            self.pool_size = workers
+        super(ThreadPoolWebhookServer, self).__init__(*args, **kwargs)
+
+    def serve_forever(self, poll_interval=0.5):
+        self._start_pool()
+        try:
+            super(ThreadPoolWebhookServer, self).serve_forever(poll_interval)
+        finally:
+            self._stop_pool()
+
+
 class WebhookHandler(BaseHTTPServer.BaseHTTPRequestHandler, object):
+    """
+    Handles webhook callbacks and media requests over persistent HTTP/1.1 connections. An idle
+    connection is closed after ``keep_alive_timeout`` seconds of the server, a falsy timeout closes
+    every connection after its response.
+
+    Note:
+        The single threaded :class:`WebhookServer` serves one connection at a time, so it closes
+        every connection by default. Only :class:`ThreadPoolWebhookServer` keeps them alive unless
+        told otherwise.
+    """
     server_version = 'WebhookHandler/1.0'
+    protocol_version = 'HTTP/1.1'
 
     def __init__(self, request, client_address, server):
         self.logger = logging.getLogger(__name__)
         super(WebhookHandler, self).__init__(request, client_address, server)
 
-    def do_HEAD(self):
-        self.send_response(200)
+    def setup(self):
+        self.timeout = self.server.keep_alive_timeout or None
+        super(WebhookHandler, self).setup()
+
+    def send_response(self, code, message=None):
+        self._connection_header = False
+        super(WebhookHandler, self).send_response(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'connection':
+            self._connection_header = True
+        super(WebhookHandler, self).send_header(keyword, value)
+
+    def end_headers(self):
+        # send_error adds its own Connection header
+        if not self.server.keep_alive_timeout and not self._connection_header:
+            self.send_header('Connection', 'close')
+        super(WebhookHandler, self).end_headers()
+
+    def _send_empty_response(self, code=200):
+        self.send_response(code)
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
+    def do_HEAD(self):
+        if not self._send_media(send_body=False):
+            self._send_empty_response()
+
     def do_GET(self):
-        if self.path.startswith(self.server.media_url) and self.path.lower().endswith(self.server.ALLOWED_GET_MEDIA_TYPES) and self.server.media_path is not None:
-            file_path = self.path.replace(self.server.media_url, '').strip('/')
-            path_parts = file_path.split('/')
-            file_path = os.path.normpath(os.path.join(self.server.media_path, *path_parts))
-            length = os.path.getsize(file_path)
+        if not self._send_media():
+            self._send_empty_response()
 
-            self.send_response(200)
-            self.send_header('content-type', 'image/jpeg, image/png')
-            self.send_header('content-length', length)
+    def _media_file(self):
+        """
+        Returns:
+            :obj:`str`: Path of the media file requested, or ``None`` if the request is not for a
+            media file. Paths leading out of ``media_path`` are not media files.
+
+        """
+        server = self.server
+        if server.media_path is None:
+            return None
+
+        path = unquote(self.path.split('?', 1)[0])
+        media_url = server.media_url.rstrip('/') + '/'
+        if not path.startswith(media_url) or not path.lower().endswith(server.ALLOWED_GET_MEDIA_TYPES):
+            return None
+
+        root = os.path.abspath(server.media_path)
+        file_path = os.path.normpath(os.path.join(root, *path[len(media_url):].split('/')))
+        if not file_path.startswith(os.path.join(root, '')):
+            return None
+        return file_path
+
+    def _send_media(self, send_body=True):
+        """Send the requested media file, or its headers only. The file is sent from the server's
+        ``media_cache`` or else streamed to the socket with ``sendfile``, honouring conditional and
+        single range requests.
+
+        Returns:
+            :obj:`bool`: ``False`` if the request is not for a media file.
+
+        """
+        file_path = self._media_file()
+        if file_path is None:
+            return False
+
+        media_cache = self.server.media_cache
+        try:
+            media = media_cache.get(file_path) if media_cache is not None else None
+            f = open(file_path, 'rb') if media is None else None
+        except (IOError, OSError):
+            self.send_error(404)
+            return True
+
+        if f is None:
+            self._send_media_file(media, None, send_body)
+        else:
+            with f:
+                self._send_media_file(MediaFile(file_path, os.fstat(f.fileno())), f, send_body)
+        return True
+
+    def _send_media_file(self, media, f, send_body):
+        if self._not_modified(media.etag, media.mtime):
+            self.send_response(304)
+            self.send_header('ETag', media.etag)
+            self.send_header('Last-Modified', media.last_modified)
             self.end_headers()
-            with open(file_path, 'rb') as f:
-                self.wfile.write(f.read())
             return
+
+        size = media.size
+        first, last = 0, size - 1
+        byte_range = self.headers.get('range')
+        if byte_range and self.headers.get('if-range', media.etag) in (media.etag, media.last_modified):
+            try:
+                byte_range = _parse_range(byte_range, size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header('Content-Range', 'bytes */{0}'.format(size))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if byte_range is not None:
+                first, last = byte_range
         else:
+            byte_range = None
+
+        if byte_range is None:
             self.send_response(200)
-            self.end_headers()
+        else:
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(first, last, size))
+        self.send_header('Content-Type', media.content_type)
+        self.send_header('Content-Length', str(last - first + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', media.etag)
+        self.send_header('Last-Modified', media.last_modified)
+        self.end_headers()
+
+        if not send_body or last < first:
+            return
+        if media.data is not None:
+            self.wfile.write(memoryview(media.data)[first:last + 1])
+        else:
+            self.wfile.flush()
+            self.connection.sendfile(f, first, last - first + 1)
+
+    def _not_modified(self, etag, mtime):
+        if_none_match = self.headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or 'W/' + etag in tags
+
+        if_modified_since = self.headers.get('if-modified-since')
+        if if_modified_since is not None:
+            since = parsedate_tz(if_modified_since)
+            return since is not None and int(mtime) <= mktime_tz(since)
+
+        return False
 
     def do_POST(self):
         self.logger.debug('Webhook triggered')
         try:
             clen = self._get_content_len()
-            buf = self.rfile.read(clen)
+            buf = self._read_body(clen)
             self._validate_post(buf)
         except _InvalidPost as e:
             self.send_error(e.http_code)
-            self.end_headers()
         else:
-            json_string = bytes_to_native_str(buf)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug('Webhook received data: %s', bytes(buf).decode('utf-8', 'replace'))
 
-            self.send_response(200)
-            self.end_headers()
+            try:
+                data = codec.loads(buf)
+            except ValueError:
+                self.send_error(400)
+                return
 
-            self.logger.debug('Webhook received data: ' + json_string)
+            try:
+                event = LazyEvent.from_dict(data, self.server.bot) if isinstance(data, dict) else None
+            except (TypeError, ValueError, KeyError, AttributeError):
+                event = None
+            if event is None:
+                # Signed by Viber, so acknowledged to stop it being delivered again
+                self.logger.warning('Dropping webhook data which is not a valid event')
+                self._send_empty_response()
+                return
 
-            event = Event.from_dict(json.loads(json_string), self.server.bot)
+            self.logger.debug('Received Event with message_token %s on Webhook', event.message_token)
+            deduplicator = self.server.deduplicator
+            if deduplicator is not None and deduplicator.is_duplicate(event):
+                # Acknowledged again so Viber stops redelivering it
+                self.logger.debug('Dropping duplicate event with message_token %s', event.message_token)
+                self._send_empty_response()
+                return
 
-            self.logger.debug('Received Event with message_token %d on Webhook' % event.message_token)
-            self.server.event_queue.put(event)
+            # Only acknowledge events which were queued, Viber redelivers the rejected ones
+            try:
+                if isinstance(self.server.event_queue, EventQueue):
+                    self.server.event_queue.put(event, raw=buf)
+                else:
+                    self.server.event_queue.put(event)
+            except Full:
+                if deduplicator is not None:
+                    deduplicator.forget(event)
+                self.logger.warning('Event queue is full, rejecting event with message_token %s', event.message_token)
+                self.send_error(503)
+                return
+
+            self._send_empty_response()
+
+    def _read_body(self, clen):
+        """Read the body into the buffer of this thread, which is hashed and parsed in place.
+
+        Returns:
+            :obj:`memoryview`: The body, valid until the next request on this thread.
+
+        """
+        buffer = getattr(self.server.buffers, 'buffer', None)
+        if buffer is None or len(buffer) < clen:
+            buffer = bytearray(clen)
+            if clen <= MAX_REUSED_BUFFER_SIZE:
+                self.server.buffers.buffer = buffer
+
+        body = memoryview(buffer)[:clen]
+        read = 0
+        while read < clen:
+            n = self.rfile.readinto(body[read:])
+            if not n:
+                raise _InvalidPost(400)
+            read += n
+        return body
 
     def _calculate_message_signature(self, message):
-        return hmac.new(bytes(self.server.bot.token.encode('ascii')), msg=message, digestmod=hashlib.sha256).hexdigest()
+        signature_hmac = self.server.signature_hmac.copy()
+        signature_hmac.update(message)
+        return signature_hmac.digest()
 
     def verify_signature(self, request_data, signature):
-        return signature == self._calculate_message_signature(request_data)
+        try:
+            signature = binascii.unhexlify(signature)
+        except (TypeError, ValueError):
+            return False
+        return hmac.compare_digest(signature, self._calculate_message_signature(request_data))
 
     def _validate_post(self, data):
         if not (self.verify_signature(data, self.path.replace('/?sig=', "")) and 'content-type' in self.headers and self.headers['content-type'] == 'application/json;charset=UTF-8'):